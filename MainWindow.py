@@ -1,66 +1,112 @@
+import atexit
 import sys
-import ast
-
-from PyQt5 import uic
-from PyQt5.QtCore import pyqtSlot
-from PyQt5.QtSql import QSqlQuery, QSqlDatabase
-from PyQt5.QtWidgets import *
-from astropy.io import fits
-from matplotlib.backends.backend_qtagg import (
-    FigureCanvasQTAgg)
-from matplotlib.figure import Figure
-
-IMAGE_PATH_BEAMS = "data/beams"
-IMAGE_PATH_SYNTHESIS = "data/synthesis"
-IMAGE_PATH_SDSS = "data/SDSS"
+import time
+from collections import deque
 
+import hashlib
 
-class MplCanvas(FigureCanvasQTAgg):
-    """Ultimately, this is a QWidget (as well as a FigureCanvasAgg, etc.)."""
-
-    def __init__(self, parent, width=5, height=4, dpi=100):
-        self.fig = Figure(figsize=(width, height), dpi=dpi, constrained_layout=True)
-        self.axes = self.fig.add_subplot(111)
-        super(MplCanvas, self).__init__(self.fig)
-
-    def plot_beams(self, file_path):
-        with fits.open(file_path) as hdu:
-            freq = hdu[1].data['freq']
-            TABL = hdu[1].data['TABL']
+from PyQt5.QtCore import QEventLoop, Qt, QTimer, pyqtSlot
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtWidgets import *
 
-        self.axes.plot(freq, TABL)
-        print(type(self.fig.canvas))
-        self.fig.canvas.draw()
+from decimate import SpectrumPyramid
+from galaxy_queue import GalaxyQueue
+from memory_watchdog import DEFAULT_CEILING_MB, MemoryWatchdog
+from results_writer import ResultsWriter
+from sdss_images import ThumbnailCache
+from spectra import BEAM_FLUX_COLUMN, SYNTHESIS_FLUX_COLUMN, SpectrumCache, SpectrumPrefetcher
+from spectrum_store import SpectrumStore
+from tracing import tracer
 
-    def plot_synthesis(self, file_path):
-        with fits.open(file_path) as hdu:
-            freq = hdu[1].data['freq']
-            FLUXBL = hdu[1].data['FLUXBL']
-        self.axes.plot(freq, FLUXBL)
-        self.fig.canvas.draw()
+UI_FILE = "mainwindow.ui"
 
-    def plot_SDSS(self, data):
-        pass
+PREFETCH_DEPTH = 3  # number of upcoming galaxies whose spectra are decoded in the background
+SPECTRUM_CACHE_BYTES = 512 * 1024 ** 2  # memory budget for decoded spectra
+MIN_SPECTRUM_CACHE_BYTES = 32 * 1024 ** 2  # the memory watchdog does not shrink the budget below this
+SDSS_POLL_MS = 30  # how often a cutout still being decoded is checked on
+UNDO_DEPTH = 10  # decisions that can be taken back with Ctrl+Z
+FAST_MODE_HELP = "Fast mode: 1-3 set the highlighted flag, Up/Down choose another, Enter saves and moves on, " \
+                 "Ctrl+Z or Backspace goes back"
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, prefetch_depth=PREFETCH_DEPTH, spectrum_cache_bytes=SPECTRUM_CACHE_BYTES,
+                 memory_ceiling_mb=DEFAULT_CEILING_MB, fast_mode=False):
         super(MainWindow, self).__init__()
-        uic.loadUi("mainwindow.ui", self)
+        self.fast_mode = fast_mode
+        self.load_ui()
         self.setWindowTitle("Galaxy Inspector")
         self.moveWindowToScreenCenter()
 
-        self.dbQuery = QSqlQuery(QSqlDatabase.database())
-        self.dbQuery.setForwardOnly(True)
+        self.spectrum_cache = SpectrumCache(max_bytes=spectrum_cache_bytes, store=SpectrumStore())
+        self.prefetcher = SpectrumPrefetcher(self.spectrum_cache, depth=prefetch_depth, prepare=SpectrumPyramid)
+        self.thumbnail_cache = ThumbnailCache()
+        self.sdss_prefetcher = SpectrumPrefetcher(self.thumbnail_cache, depth=prefetch_depth, max_workers=1,
+                                                  name="sdss")
+        self.upcoming_galaxies = []
+        self.decisions = deque(maxlen=UNDO_DEPTH)  # (galaxy, flags) of the last galaxies saved
+        self.active_group = 0  # fast mode: index into visible_flag_groups() of the flag the digit keys set
+        self.queue = GalaxyQueue()
+        # the leases would lapse while a galaxy stays on screen for longer than lease_seconds
+        self.renew_timer = QTimer(self)
+        self.renew_timer.timeout.connect(self.renew_claims)
+        self.renew_timer.start(int(self.queue.lease_seconds / 3 * 1000))
+        self.results_writer = ResultsWriter()
+        self.results_writer.start()
+        # a session that ends any other way than closing the window must not leave its claims leased
+        atexit.register(self.end_session)
+        writer_hook = sys.excepthook
+
+        def excepthook(*exc_info):
+            self.end_session()
+            # flushes what is left and ends the process
+            writer_hook(*exc_info)
+
+        sys.excepthook = excepthook
+        self.memory_watchdog = MemoryWatchdog(self.trim_memory, memory_ceiling_mb, parent=self)
+        self.memory_watchdog.start()
+        QShortcut(QKeySequence("Ctrl+Shift+M"), self, self.memory_watchdog.report)
         self.current_galaxy = self.next_db_entry()
         self.set_galaxy_name(self.current_galaxy["galaxy_name"])
         self.init_widgets()
+        self.show_active_group()
         self.plot_images(self.current_galaxy)
 
+    def load_ui(self):
+        # the precompiled form skips parsing the XML at startup; it is only trusted while it was
+        # generated from the current mainwindow.ui (see compile_ui.py)
+        with open(UI_FILE, 'rb') as fd:
+            ui_hash = hashlib.sha1(fd.read()).hexdigest()
+        try:
+            from ui_mainwindow import UI_SOURCE_HASH, Ui_MainWindow
+        except ImportError:
+            UI_SOURCE_HASH = None
+        if UI_SOURCE_HASH == ui_hash:
+            self.ui = Ui_MainWindow()
+            self.ui.setupUi(self)
+        else:
+            from PyQt5 import uic
+            uic.loadUi(UI_FILE, self)
+
     def set_galaxy_name(self, galaxy_name):
         self.label_galaxy_name = self.findChild(QLabel, "label_galaxy_name")
         self.label_galaxy_name.setText(f"Galaxy name: {galaxy_name}")
 
+    def end_session(self):
+        self.results_writer.close()
+        # only after the writer is done, or a galaxy saved a moment ago could be claimed again
+        self.queue.release()
+
+    def closeEvent(self, event):
+        self.end_session()
+        print("Results writer: ", self.results_writer.stats())
+        self.prefetcher.shutdown()
+        self.sdss_prefetcher.shutdown()
+        print("Spectrum cache: ", self.spectrum_cache.stats())
+        print("SDSS thumbnails: ", self.thumbnail_cache.stats())
+        print("Memory watchdog trims: ", self.memory_watchdog.trims)
+        super(MainWindow, self).closeEvent(event)
+
     def moveWindowToScreenCenter(self):
         qtRectangle = self.frameGeometry()
         centerPoint = QDesktopWidget().availableGeometry().center()
@@ -74,66 +120,78 @@ class MainWindow(QMainWindow):
 
         self.btn_next = self.findChild(QPushButton, "btn_next")
         self.btn_next.clicked.connect(self.go_to_next_galaxy)
+        self.init_shortcuts()
+
+    def init_shortcuts(self):
+        QShortcut(QKeySequence.Undo, self, self.undo)
+        if not self.fast_mode:
+            return
+        # the flags are set from the keyboard and Enter moves on without asking, the results being
+        # written in the background while the next galaxy is shown; mistakes are taken back with undo
+        for value in (1, 2, 3):
+            QShortcut(QKeySequence(str(value)), self, lambda value=value: self.set_active_flag(value))
+        QShortcut(QKeySequence(Qt.Key_Down), self, lambda: self.move_active_group(1))
+        QShortcut(QKeySequence(Qt.Key_Up), self, lambda: self.move_active_group(-1))
+        QShortcut(QKeySequence(Qt.Key_Return), self, self.advance)
+        QShortcut(QKeySequence(Qt.Key_Enter), self, self.advance)
+        QShortcut(QKeySequence(Qt.Key_Backspace), self, self.undo)
+        self.statusBar().showMessage(FAST_MODE_HELP)
 
     @pyqtSlot()
     def go_to_next_galaxy(self):
+        if self.fast_mode:
+            self.advance()
+            return
         button = QMessageBox.question(self, "Save Results", "Do you want to save your selection?")
         if button == QMessageBox.Yes:
-            self.save_results()
-            self.del_current_galaxy_from_database()
+            self.advance()
+        else:
+            print("No!")
+
+    def advance(self):
+        """Save the current selection and show the next galaxy."""
+        with tracer.span("advance", galaxy=self.current_galaxy["galaxy_name"]):
+            with tracer.span("save"):
+                self.save_results()
             self.current_galaxy = self.next_db_entry()
-            self.set_galaxy_name(self.current_galaxy["galaxy_name"])
-            self.setBeamGroupBoxVisibility()
+            self.show_current_galaxy()
+
+    def undo(self):
+        """Take back the last decision: its galaxy is shown again, with the flags it was saved with."""
+        if not self.decisions:
+            self.statusBar().showMessage("Nothing to undo")
+            return
+        galaxy, flags = self.decisions.pop()
+        with tracer.span("undo", galaxy=galaxy["galaxy_name"]):
+            self.results_writer.undo(galaxy["id"], galaxy["galaxy_name"], self.queue.inspector,
+                                     time.time() + self.queue.lease_seconds)
+            # the galaxy on screen was not saved, it comes next again
+            self.queue.unpop(self.current_galaxy)
+            self.current_galaxy = galaxy
+            self.upcoming_galaxies = self.queue.peek(self.prefetcher.depth)
+            self.prefetch_galaxies([self.current_galaxy] + self.upcoming_galaxies)
+            self.show_current_galaxy()
+            self.setUserResults(flags)
+        self.statusBar().showMessage(f"Took back {galaxy['galaxy_name']}, {len(self.decisions)} more can be undone")
+
+    def show_current_galaxy(self):
+        self.set_galaxy_name(self.current_galaxy["galaxy_name"])
+        self.setBeamGroupBoxVisibility()
+        self.active_group = 0
+        self.show_active_group()
 
+        with tracer.span("plot", galaxy=self.current_galaxy["galaxy_name"]):
             self.plot_images(self.current_galaxy)
 
-        else:
-            print("No!")
-
     def save_results(self):
-        beam1, beam2, beam3, beam4, synthesis = self.getUserResults()
-        print("用户选择结果：", beam1, beam2, beam3, beam4, synthesis)
-        # save user selection to database
-        user_inspection_query = QSqlQuery()
-        user_inspection_query.prepare("""
-            INSERT INTO results (
-                galaxy_name,
-                beam1_rfi_flag,
-                beam1_ripple_flag,
-                beam2_rfi_flag,
-                beam2_ripple_flag,
-                beam3_rfi_flag,
-                beam3_ripple_flag,
-                beam4_rfi_flag,
-                beam4_ripple_flag,
-                synthesis_signal_flag,
-                synthesis_baseline_flag
-                )
-            VALUES (:galaxy_name,:beam1_rfi_flag,:beam1_ripple_flag,:beam2_rfi_flag,:beam2_ripple_flag,:beam3_rfi_flag,:beam3_ripple_flag,:beam4_rfi_flag,:beam4_ripple_flag,:synthesis_signal_flag,:synthesis_baseline_flag)
-            """)
-        user_inspection_query.bindValue(":galaxy_name", self.current_galaxy["galaxy_name"])
-        user_inspection_query.bindValue(":beam1_rfi_flag", beam1[0])
-        user_inspection_query.bindValue(":beam1_ripple_flag", beam1[1])
-        user_inspection_query.bindValue(":beam2_rfi_flag", beam2[0])
-        user_inspection_query.bindValue(":beam2_ripple_flag", beam2[1])
-        user_inspection_query.bindValue(":beam3_rfi_flag", beam3[0])
-        user_inspection_query.bindValue(":beam3_ripple_flag", beam3[1])
-        user_inspection_query.bindValue(":beam4_rfi_flag", beam4[0])
-        user_inspection_query.bindValue(":beam4_ripple_flag", beam4[1])
-        user_inspection_query.bindValue(":synthesis_signal_flag", synthesis[0])
-        user_inspection_query.bindValue(":synthesis_baseline_flag", synthesis[1])
-        return user_inspection_query.exec()
-
-    def del_current_galaxy_from_database(self):
-        del_query = QSqlQuery()
-        del_query.prepare(f"""
-        DELETE FROM galaxies WHERE galaxy_name = ?
-        """)
-        galaxy_name = self.current_galaxy["galaxy_name"]
-        # print(galaxy_name)
-        del_query.addBindValue(galaxy_name)
-        del_query.exec()
-        print("number of rows affected: ", del_query.numRowsAffected())
+        results = self.getUserResults()
+        print("用户选择结果：", *results)
+        # the writer thread inserts the results and marks the galaxy done in one transaction
+        self.results_writer.save(self.current_galaxy["id"], self.current_galaxy["galaxy_name"], results)
+        self.decisions.append((self.current_galaxy, results))
+        stats = self.results_writer.stats()
+        self.statusBar().showMessage(f"Results queued: {stats['queue_depth']}, "
+                                     f"last commit {stats['last_commit_latency_ms']:.1f} ms")
 
     def getUserResults(self):
         # 收集beams和synthesis附属的radio button的状态
@@ -209,66 +267,165 @@ class MainWindow(QMainWindow):
                (beam3_rfi_flag, beam3_ripple_flag), (beam4_rfi_flag, beam4_ripple_flag), \
                (synthesis_signal_flag, baseline_flag)
 
+    def renew_claims(self):
+        held = self.queue.renew()
+        if held is None or self.current_galaxy["id"] in held:
+            return
+        # an undo of the galaxy on screen may still be on its way to the database
+        self.results_writer.flush()
+        held = self.queue.renew()
+        if held is not None and self.current_galaxy["id"] not in held:
+            self.statusBar().showMessage(f"{self.current_galaxy['galaxy_name']} was claimed by another inspector "
+                                         f"while its lease had lapsed; it is being inspected twice")
+
+    def setUserResults(self, flags):
+        """Check the radio buttons of flags, as returned by getUserResults."""
+        for pair, groups in zip(flags, self.flag_groups):
+            for flag, group in zip(pair, groups):
+                # 0 is a hidden beam, whose buttons are left as they are
+                if flag:
+                    group.buttons()[flag - 1].setChecked(True)
+
+    def visible_flag_groups(self):
+        return [group for groups in self.flag_groups for group in groups if not group.parent().isHidden()]
+
+    def show_active_group(self):
+        if not self.fast_mode:
+            return
+        groups = self.visible_flag_groups()
+        self.active_group %= len(groups)
+        # the focus frame around the checked button marks the flag the digit keys set
+        groups[self.active_group].checkedButton().setFocus()
+
+    def move_active_group(self, step):
+        self.active_group += step
+        self.show_active_group()
+
+    def set_active_flag(self, value):
+        buttons = self.visible_flag_groups()[self.active_group].buttons()
+        if value > len(buttons):
+            return
+        buttons[value - 1].setChecked(True)
+        # flags are mostly set one after the other
+        self.move_active_group(1)
+
     def setCanvas(self, container):
+        # matplotlib is only imported once the first canvas is built
+        from plot_widgets import MplCanvas
         canvas = MplCanvas(self)
         layout = QGridLayout(container)
         layout.addWidget(canvas)
         return canvas
 
     def next_db_entry(self):
-        if self.dbQuery.exec("SELECT galaxy_name, beam_file_path, synthesis_file_path, sdss_file_path FROM galaxies"):
-            if self.dbQuery.next():
-                name, beams, synthesis, sdss = range(4)
-                name = self.dbQuery.value(name)
-                beams = self.dbQuery.value(beams)
-                synthesis = self.dbQuery.value(synthesis)
-                sdss = self.dbQuery.value(sdss)
-                self.current_galaxy = {
-                    "galaxy_name": name,
-                    "beams": beams,
-                    "synthesis": synthesis,
-                    "sdss": sdss
-                }
-                print("Current Galaxy: ")
-                print("-" * 10)
-                return self.current_galaxy
-            else:
-                print(self.dbQuery.lastError().text())
-                sys.exit(-1)
-        else:
-            print(__file__, "db error", self.dbQuery.lastError().text())
+        with tracer.span("db.next"):
+            galaxy = self.queue.pop()
+            while galaxy is None:
+                if self.queue.locked:
+                    # other inspectors or features.py hold the write lock for longer than the busy timeout
+                    self.statusBar().showMessage("The database is locked by another process, "
+                                                 "still trying to claim galaxies")
+                    # a keypress now would save the galaxy just saved a second time
+                    QApplication.processEvents(QEventLoop.ExcludeUserInputEvents)
+                else:
+                    self.wait_for_claimed_galaxies()
+                galaxy = self.queue.pop()
+            self.current_galaxy = galaxy
+            self.upcoming_galaxies = self.queue.peek(self.prefetcher.depth)
+        # the current galaxy stays in the window so an in-flight read of it is not discarded
+        self.prefetch_galaxies([self.current_galaxy] + self.upcoming_galaxies)
+        print("Current Galaxy: ")
+        print("-" * 10)
+        return self.current_galaxy
+
+    def wait_for_claimed_galaxies(self):
+        """Called when nothing is left to claim: exits, unless other inspectors still hold galaxies."""
+        claimed, next_expiry = self.queue.claimed_by_others()
+        if not claimed:
+            print("No galaxies left to inspect")
+            sys.exit(-1)
+        # e.g. those of a session that was killed, until their leases expire
+        message = f"{claimed} galaxies are claimed by other inspectors, " \
+                  f"next lease expires at {time.strftime('%H:%M:%S', time.localtime(next_expiry))}"
+        print(message)
+        button = QMessageBox.question(self, "Galaxies claimed", f"{message}.\n\nTry again?",
+                                      QMessageBox.Retry | QMessageBox.Close, QMessageBox.Retry)
+        if button != QMessageBox.Retry:
             sys.exit(-1)
 
+    def prefetch_galaxies(self, galaxies):
+        spectra = []
+        for galaxy in galaxies:
+            for beam in galaxy["beams"]:
+                spectra.append((beam, BEAM_FLUX_COLUMN))
+            spectra.append((galaxy["synthesis"], SYNTHESIS_FLUX_COLUMN))
+        self.prefetcher.prefetch(spectra)
+        self.sdss_prefetcher.prefetch([(galaxy["sdss"],) for galaxy in galaxies if galaxy["sdss"]])
+
     def plot_images(self, data=None):
         if data is None:
             print("No data about current galaxy!")
             sys.exit(-1)
         # plot beams
-        beams = ast.literal_eval(data["beams"])
+        beams = data["beams"]
         for i, beam in enumerate(beams):
-            self.beam_canvases[i].plot_beams(beam)
+            self.beam_canvas(i).plot_beams(self.prefetcher.get(beam, BEAM_FLUX_COLUMN))
+        # hidden beams keep neither a spectrum alive nor get drawn
+        for canvas in self.beam_canvases[len(beams):]:
+            if canvas is not None:
+                canvas.clear_spectrum()
 
         # plot synthesis
         synthesis = data['synthesis']
-        self.canvas_synthesis.plot_synthesis(synthesis)
+        self.canvas_synthesis.plot_synthesis(self.prefetcher.get(synthesis, SYNTHESIS_FLUX_COLUMN))
+
+        self.plot_sdss(data)
+
+    def plot_sdss(self, galaxy):
+        if galaxy is not self.current_galaxy:
+            return  # moved on while the cutout was decoded
+        if not galaxy["sdss"]:
+            if self.canvas_SDSS is not None:
+                self.canvas_SDSS.clear_image()
+            return
+        try:
+            image = self.sdss_prefetcher.get_nowait(galaxy["sdss"])
+        except Exception as e:
+            print(f"Cannot show {galaxy['sdss']}: {type(e).__name__}: {e}")
+            image = None
+        else:
+            if image is None:
+                # the spectra do not wait for the cutout; it is shown as soon as it is decoded
+                QTimer.singleShot(SDSS_POLL_MS, lambda: self.plot_sdss(galaxy))
+        if image is None:
+            if self.canvas_SDSS is not None:
+                self.canvas_SDSS.clear_image()
+            return
+        if self.canvas_SDSS is None:
+            self.canvas_SDSS = self.setCanvas(self.findChild(QWidget, "widget_SDSS"))
+        self.canvas_SDSS.plot_SDSS(image)
 
     def initPlotWidget(self):
-        widget_beam1 = self.findChild(QWidget, "widget_beam1")
-        widget_beam2 = self.findChild(QWidget, "widget_beam2")
-        widget_beam3 = self.findChild(QWidget, "widget_beam3")
-        widget_beam4 = self.findChild(QWidget, "widget_beam4")
-        widget_synthesis = self.findChild(QWidget, "widget_synthesis")
-        widget_sdss = self.findChild(QWidget, "widget_SDSS")
-        self.canvas_beam1 = self.setCanvas(widget_beam1)
-        self.canvas_beam2 = self.setCanvas(widget_beam2)
-        self.canvas_beam3 = self.setCanvas(widget_beam3)
-        self.canvas_beam4 = self.setCanvas(widget_beam4)
-        self.beam_canvases = [self.canvas_beam1, self.canvas_beam2, self.canvas_beam3, self.canvas_beam4]
-        self.canvas_synthesis = self.setCanvas(widget_synthesis)
-        self.canvas_SDSS = self.setCanvas(widget_sdss)
+        # beam canvases are built the first time a galaxy has that many beams
+        self.beam_containers = [self.findChild(QWidget, f"widget_beam{i}") for i in range(1, 5)]
+        self.beam_canvases = [None] * len(self.beam_containers)
+        self.canvas_synthesis = self.setCanvas(self.findChild(QWidget, "widget_synthesis"))
+        self.canvas_SDSS = None  # built with the first SDSS cutout
+
+    def beam_canvas(self, i):
+        if self.beam_canvases[i] is None:
+            self.beam_canvases[i] = self.setCanvas(self.beam_containers[i])
+        return self.beam_canvases[i]
+
+    def trim_memory(self):
+        """Called by the memory watchdog when the process grows past its ceiling."""
+        # the spectra on screen are held by the canvases and upcoming ones by the prefetcher, so the
+        # cache can go; a smaller budget keeps it from growing straight back
+        self.spectrum_cache.clear()
+        self.spectrum_cache.max_bytes = max(self.spectrum_cache.max_bytes // 2, MIN_SPECTRUM_CACHE_BYTES)
 
     def setBeamGroupBoxVisibility(self):
-        beam_number = len(ast.literal_eval(self.current_galaxy["beams"]))
+        beam_number = len(self.current_galaxy["beams"])
         if beam_number == 1:
             self.gb_beam1.setVisible(True)
             self.gb_beam2.setVisible(False)
@@ -380,3 +537,8 @@ class MainWindow(QMainWindow):
         self.bg_synthesis_baseline.addButton(self.rb_synthesis_baseline_1)
         self.bg_synthesis_baseline.addButton(self.rb_synthesis_baseline_2)
         self.rb_synthesis_baseline_1.setChecked(True)
+
+        # in the order of getUserResults
+        self.flag_groups = [(self.bg_beam1_rfi, self.bg_beam1_ripple), (self.bg_beam2_rfi, self.bg_beam2_ripple),
+                            (self.bg_beam3_rfi, self.bg_beam3_ripple), (self.bg_beam4_rfi, self.bg_beam4_ripple),
+                            (self.bg_synthesis_signal, self.bg_synthesis_baseline)]
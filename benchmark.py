@@ -0,0 +1,218 @@
+"""Benchmark the load -> decode -> render -> save loop of the inspector on synthetic data.
+
+    python benchmark.py --galaxies 200 --channels 32768 --steps 100 --output run.json
+    python benchmark.py --compare run.json --output after.json
+
+A catalogue of FITS files with the survey layout (a freq column plus TABL for beams, FLUXBL for
+synthesis) is generated in a scratch directory, loaded with init_database and then stepped
+through with MainWindow.advance() on the offscreen Qt platform, exactly as the Next button does.
+Per-stage latencies come from the hot-path spans (see tracing.py); the report also holds
+throughput, peak RSS and the configuration, and is written as JSON so runs can be compared.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def generate_catalogue(root, galaxies, channels, seed=0):
+    """Write galaxies synthesis files and 1-4 beam files each under root/data; returns the file count."""
+    from astropy.io import fits
+
+    rng = np.random.default_rng(seed)
+    beams_dir = os.path.join(root, "data", "beams")
+    synthesis_dir = os.path.join(root, "data", "synthesis")
+    os.makedirs(beams_dir, exist_ok=True)
+    os.makedirs(synthesis_dir, exist_ok=True)
+    freq = np.linspace(1420.0, 1380.0, channels)
+    channel = np.arange(channels)
+
+    def write(path, flux_column, flux):
+        columns = [fits.Column(name="freq", format="D", array=freq),
+                   fits.Column(name=flux_column, format="D", array=flux)]
+        fits.BinTableHDU.from_columns(columns).writeto(path, overwrite=True)
+
+    files = 0
+    for g in range(galaxies):
+        name = f"AGC{100000 + g}"
+        for beam in range(1 + g % 4):
+            # baseline ripple plus a few single-channel RFI spikes, like the real beams
+            flux = rng.normal(size=channels) + 0.5 * np.sin(channel * rng.uniform(0.001, 0.01))
+            flux[rng.integers(0, channels, 5)] += rng.uniform(20, 100, 5)
+            write(os.path.join(beams_dir, f"{name}_M{beam}_file{beam + 1}.fits"), "TABL", flux)
+            files += 1
+        flux = rng.normal(scale=0.2, size=channels)
+        flux[channels // 2 - 50:channels // 2 + 50] += 3.0
+        write(os.path.join(synthesis_dir, f"{name}.fits"), "FLUXBL", flux)
+        files += 1
+    return files
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args, workdir):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    report = {
+        "config": {"galaxies": args.galaxies, "channels": args.channels, "steps": args.steps,
+                   "warmup": args.warmup, "prefetch_depth": args.prefetch_depth, "seed": args.seed},
+        "environment": {"python": platform.python_version(), "numpy": np.__version__,
+                        "platform": platform.platform(), "commit": git_commit()},
+    }
+
+    start = time.perf_counter()
+    files = generate_catalogue(workdir, args.galaxies, args.channels, args.seed)
+    report["generate"] = {"files": files, "seconds": time.perf_counter() - start}
+
+    # the inspector works on paths relative to the current directory
+    shutil.copy(os.path.join(HERE, "mainwindow.ui"), workdir)
+    os.chdir(workdir)
+
+    from PyQt5.QtWidgets import QApplication
+    import main
+    from MainWindow import MainWindow
+    from tracing import tracer
+
+    app = QApplication(sys.argv[:1])
+    if not main.createConnection():
+        sys.exit("Unable to open the benchmark database")
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        main.init_database()
+    elapsed = time.perf_counter() - start
+    report["init_database"] = {"galaxies": args.galaxies, "seconds": elapsed, "rows_per_s": args.galaxies / elapsed}
+
+    tracer.enabled = True
+    # printing every galaxy would measure the terminal
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        window = MainWindow(prefetch_depth=args.prefetch_depth)
+        window.show()
+        app.processEvents()
+
+        step_ms = []
+        for step in range(args.warmup + args.steps):
+            if step == args.warmup:
+                tracer.clear()
+                loop_start = time.perf_counter()
+            step_start = time.perf_counter()
+            window.advance()
+            # runs the draws that plot_beams/plot_synthesis requested with draw_idle
+            app.processEvents()
+            if step >= args.warmup:
+                step_ms.append((time.perf_counter() - step_start) * 1000)
+        loop_elapsed = time.perf_counter() - loop_start
+
+        start = time.perf_counter()
+        window.results_writer.flush()
+        flush_elapsed = time.perf_counter() - start
+        writer_stats = window.results_writer.stats()
+        cache_stats = window.spectrum_cache.stats()
+        window.close()
+
+    steps = np.array(step_ms)
+    report["loop"] = {
+        "galaxies": args.steps,
+        "seconds": loop_elapsed,
+        "galaxies_per_s": args.steps / loop_elapsed,
+        "step_p50_ms": float(np.percentile(steps, 50)),
+        "step_p95_ms": float(np.percentile(steps, 95)),
+        "step_p99_ms": float(np.percentile(steps, 99)),
+        "step_max_ms": float(steps.max()),
+        "final_flush_ms": flush_elapsed * 1000,
+    }
+    report["spans"] = tracer.summary()
+    report["results_writer"] = writer_stats
+    report["spectrum_cache"] = cache_stats
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def compare(report, baseline):
+    """Print each latency of report next to the same one in baseline."""
+    print(f"{'metric':<34}{'baseline':>12}{'this run':>12}{'change':>10}")
+
+    def row(label, old, new):
+        if old is None or new is None:
+            return
+        change = f"{(new - old) / old * 100:+.1f}%" if old else ""
+        print(f"{label:<34}{old:>12.2f}{new:>12.2f}{change:>10}")
+
+    for key in ("galaxies_per_s", "step_p50_ms", "step_p95_ms", "step_p99_ms"):
+        row(f"loop.{key}", baseline.get("loop", {}).get(key), report["loop"][key])
+    row("init_database.rows_per_s", baseline.get("init_database", {}).get("rows_per_s"),
+        report["init_database"]["rows_per_s"])
+    for name, stats in sorted(report["spans"].items()):
+        old = baseline.get("spans", {}).get(name, {})
+        for key in ("p50_ms", "p95_ms"):
+            row(f"{name}.{key}", old.get(key), stats[key])
+    row("peak_rss_mb", baseline.get("peak_rss_mb"), report["peak_rss_mb"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--galaxies", type=int, default=100)
+    parser.add_argument("--channels", type=int, default=32768, help="channels per spectrum")
+    parser.add_argument("--steps", type=int, default=50, help="galaxies to step through after the warmup")
+    parser.add_argument("--warmup", type=int, default=3, help="steps run before measuring, e.g. to import astropy")
+    parser.add_argument("--prefetch-depth", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="where the synthetic catalogue goes (default: a temporary directory)")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary directory")
+    parser.add_argument("--output", help="write the report to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON report of an earlier run to compare against")
+    args = parser.parse_args()
+    # the window exits when the queue runs dry, and it shows one galaxy before the first step
+    if args.warmup + args.steps >= args.galaxies:
+        parser.error("--galaxies must be larger than --warmup plus --steps")
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="galaxy-bench-")
+    try:
+        report = run(args, workdir)
+    finally:
+        os.chdir(HERE)
+        if not args.workdir and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if output:
+        with open(output, 'w') as fd:
+            json.dump(report, fd, indent=1)
+        print(f"Report written to {output}")
+    else:
+        print(json.dumps(report, indent=1))
+    if baseline_path:
+        with open(baseline_path) as fd:
+            compare(report, json.load(fd))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+
+# AGC<galaxy>_M<beam>_file<file>.fits in data/beams, AGC<galaxy>.fits in data/synthesis
+BEAM_FILE_PATTERN = re.compile(r"(AGC\d+)_M(\d+)_file(\d+)\.fits$")
+SYNTHESIS_FILE_PATTERN = re.compile(r"(AGC\d+)\.fits$")
+# AGC<galaxy>.jpg (or .jpeg, .png, .fits) in data/SDSS
+SDSS_FILE_PATTERN = re.compile(r"(AGC\d+)\.(jpe?g|png|fits?)$", re.IGNORECASE)
+
+
+def parse_file_name(name):
+    """Return ("beam", galaxy_name, beam, file) or ("synthesis", galaxy_name), None for other files."""
+    match = BEAM_FILE_PATTERN.match(name)
+    if match:
+        return "beam", match.group(1), int(match.group(2)), int(match.group(3))
+    match = SYNTHESIS_FILE_PATTERN.match(name)
+    if match:
+        return "synthesis", match.group(1)
+    return None
+
+
+def _scan_dir(path):
+    # DirEntry carries the file type from the directory listing, so only regular files are stat'ed
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name == '.DS_Store' or not entry.is_file():  # ignore the auto generated file on Mac
+                continue
+            st = entry.stat()
+            yield entry.name, entry.path, st.st_size, st.st_mtime_ns
+
+
+def group_catalogue(beam_files, synthesis_files):
+    """Group (galaxy_name, path, size, mtime_ns) records of beam and synthesis files by galaxy.
+
+    Returns {galaxy_name: {"beam_files", "beams", "synthesis", "signature"}} where beam_files
+    holds (path, size, mtime_ns) tuples and the signature changes whenever any of the galaxy's
+    files is added, removed or rewritten.
+    """
+    beam_dict = defaultdict(list)
+    for galaxy_name, path, size, mtime in beam_files:
+        beam_dict[galaxy_name].append((path, size, mtime))
+
+    synthesis_dict = {}
+    for galaxy_name, path, size, mtime in synthesis_files:
+        synthesis_dict[galaxy_name] = (path, size, mtime)
+
+    catalogue = {}
+    for galaxy_name, beam_files in beam_dict.items():
+        synthesis = synthesis_dict.get(galaxy_name)
+        if synthesis is None:
+            print(f"Skipping {galaxy_name}: no synthesis file")
+            continue
+        beam_files.sort()
+        signature = hashlib.blake2b(repr((beam_files, synthesis)).encode(), digest_size=8).hexdigest()
+        catalogue[galaxy_name] = {
+            "beam_files": beam_files,
+            "beams": [path for path, _, _ in beam_files],
+            "synthesis": synthesis[0],
+            "signature": signature,
+        }
+    return catalogue
+
+
+def attach_sdss(catalogue, sdss_dir):
+    """Set each catalogue entry's "sdss" to its optical cutout in sdss_dir, or "" if it has none.
+
+    The cutouts are not part of the signature: an image turning up does not send a galaxy back
+    for inspection.
+    """
+    sdss = {}
+    if sdss_dir and os.path.isdir(sdss_dir):
+        for name, path, _, _ in _scan_dir(sdss_dir):
+            match = SDSS_FILE_PATTERN.match(name)
+            if match:
+                sdss[match.group(1)] = path
+    for galaxy_name, entry in catalogue.items():
+        entry["sdss"] = sdss.get(galaxy_name, "")
+    return catalogue
+
+
+def _scan_synthesis(synthesis_dir):
+    return ((name.removesuffix(".fits"), path, size, mtime) for name, path, size, mtime in _scan_dir(synthesis_dir))
+
+
+def scan_catalogue(beams_dir, synthesis_dir, sdss_dir=None):
+    """Build the catalogue from the files currently in the data directories."""
+    beam_files = ((name.split("_")[0], path, size, mtime) for name, path, size, mtime in _scan_dir(beams_dir))
+    return attach_sdss(group_catalogue(beam_files, _scan_synthesis(synthesis_dir)), sdss_dir)
+
+
+def read_manifest(manifest_path, synthesis_dir=None):
+    """Build the catalogue from the JSON lines written by ingest.py, without touching the data directories.
+
+    Manifests written while only beam files were moved by ingest.py lack synthesis records; those
+    of galaxies the manifest cannot complete are taken from a scan of synthesis_dir, when given.
+    """
+    records = {}
+    with open(manifest_path) as fd:
+        for line in fd:
+            if line.strip():
+                record = json.loads(line)
+                records[record["path"]] = record  # a file ingested again replaces its older record
+    beam_files = [(r["galaxy"], r["path"], r["size"], r["mtime"]) for r in records.values() if r["kind"] == "beam"]
+    synthesis_files = [(r["galaxy"], r["path"], r["size"], r["mtime"])
+                       for r in records.values() if r["kind"] == "synthesis"]
+    missing = {galaxy for galaxy, _, _, _ in beam_files} - {galaxy for galaxy, _, _, _ in synthesis_files}
+    if missing and synthesis_dir and os.path.isdir(synthesis_dir):
+        print(f"{len(missing)} galaxies have no synthesis file in the manifest, looking for them in {synthesis_dir}")
+        synthesis_files += [record for record in _scan_synthesis(synthesis_dir) if record[0] in missing]
+    return group_catalogue(beam_files, synthesis_files)
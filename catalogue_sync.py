@@ -0,0 +1,156 @@
+import time
+
+from PyQt5.QtSql import QSqlDatabase, QSqlQuery
+
+from catalogue import scan_catalogue
+from constants import STATUS_DONE, STATUS_PENDING, STATUS_RETIRED
+
+INSERT_BATCH = 5000
+
+
+def _insert_beams(galaxy_ids, entries):
+    columns = ([], [], [], [], [])
+    for galaxy_id, entry in zip(galaxy_ids, entries):
+        for beam_index, (path, size, mtime) in enumerate(entry["beam_files"]):
+            for column, value in zip(columns, (galaxy_id, beam_index, path, size, mtime)):
+                column.append(value)
+    query = QSqlQuery()
+    query.prepare("INSERT INTO beams (galaxy_id, beam_index, path, size, mtime) VALUES (?, ?, ?, ?, ?)")
+    for column in columns:
+        query.addBindValue(column)
+    if not query.execBatch():
+        print(__file__, "db error", query.lastError().text())
+        return False
+    return True
+
+
+def insert_galaxies(galaxies, status=STATUS_PENDING):
+    """Insert (galaxy_name, entry) pairs from scan_catalogue, with their beams, using batched statements."""
+    query = QSqlQuery()
+    query.prepare(
+        """
+        INSERT INTO galaxies (
+            galaxy_name,
+            synthesis_file_path,
+            sdss_file_path,
+            file_signature,
+            status
+        )
+        VALUES (?, ?, ?, ?, ?)
+        """
+    )
+    id_query = QSqlQuery()
+    id_query.setForwardOnly(True)
+    for first in range(0, len(galaxies), INSERT_BATCH):
+        batch = galaxies[first:first + INSERT_BATCH]
+        id_query.exec("SELECT COALESCE(MAX(id), 0) FROM galaxies")
+        id_query.next()
+        last_id = id_query.value(0)
+
+        query.addBindValue([name for name, _ in batch])
+        query.addBindValue([entry["synthesis"] for _, entry in batch])
+        query.addBindValue([entry.get("sdss", "") for _, entry in batch])
+        query.addBindValue([entry["signature"] for _, entry in batch])
+        query.addBindValue([status] * len(batch))
+        if not query.execBatch():
+            print(__file__, "db error", query.lastError().text())
+            return False
+
+        # AUTOINCREMENT ids grow monotonically, so in id order they match the batch order
+        galaxy_ids = []
+        id_query.exec(f"SELECT id FROM galaxies WHERE id > {int(last_id)} ORDER BY id")
+        while id_query.next():
+            galaxy_ids.append(id_query.value(0))
+        if not _insert_beams(galaxy_ids, [entry for _, entry in batch]):
+            return False
+    return True
+
+
+def sync_catalogue(beams_dir, synthesis_dir, sdss_dir=None):
+    """Insert new galaxies, refresh changed ones and retire those whose files are gone.
+
+    Changed galaxies are queued for inspection again; the results table is never touched. SDSS
+    cutouts that appeared, moved or vanished only update the galaxy's sdss_file_path.
+    """
+    start = time.perf_counter()
+    catalogue = scan_catalogue(beams_dir, synthesis_dir, sdss_dir)
+
+    stored = {}
+    query = QSqlQuery()
+    query.setForwardOnly(True)
+    query.exec("SELECT id, galaxy_name, file_signature, status, sdss_file_path FROM galaxies")
+    while query.next():
+        stored[query.value(1)] = (query.value(0), query.value(2), query.value(3), query.value(4))
+    # galaxies deleted from the table by older versions after inspection only survive in results
+    inspected = set()
+    query.exec("SELECT DISTINCT galaxy_name FROM results")
+    while query.next():
+        inspected.add(query.value(0))
+    query.finish()
+
+    added, changed, retired, backfilled, sdss_changed = [], [], [], [], []
+    for galaxy_name, entry in catalogue.items():
+        known = stored.get(galaxy_name)
+        if known is None:
+            added.append((galaxy_name, entry))
+            continue
+        if known[3] != entry["sdss"]:
+            sdss_changed.append((known[0], entry["sdss"]))
+        if known[1] == "":
+            # rows written before signatures existed keep their inspection status
+            backfilled.append((known[0], entry))
+        elif known[1] != entry["signature"] or known[2] == STATUS_RETIRED:
+            changed.append((known[0], entry))
+    for galaxy_name, (galaxy_id, _, status, _) in stored.items():
+        if galaxy_name not in catalogue and status != STATUS_RETIRED:
+            retired.append(galaxy_id)
+
+    if added or changed or retired or backfilled or sdss_changed:
+        con = QSqlDatabase.database()
+        con.transaction()
+        ok = insert_galaxies([galaxy for galaxy in added if galaxy[0] not in inspected])
+        if ok:
+            ok = insert_galaxies([galaxy for galaxy in added if galaxy[0] in inspected], STATUS_DONE)
+        if ok and changed:
+            update_query = QSqlQuery()
+            update_query.prepare("UPDATE galaxies SET synthesis_file_path = ?, file_signature = ?, status = ? "
+                                 "WHERE id = ?")
+            update_query.addBindValue([entry["synthesis"] for _, entry in changed])
+            update_query.addBindValue([entry["signature"] for _, entry in changed])
+            update_query.addBindValue([STATUS_PENDING] * len(changed))
+            update_query.addBindValue([galaxy_id for galaxy_id, _ in changed])
+            ok = update_query.execBatch()
+            if ok:
+                update_query.prepare("DELETE FROM beams WHERE galaxy_id = ?")
+                update_query.addBindValue([galaxy_id for galaxy_id, _ in changed])
+                ok = update_query.execBatch()
+            if ok:
+                ok = _insert_beams([galaxy_id for galaxy_id, _ in changed], [entry for _, entry in changed])
+        if ok and backfilled:
+            backfill_query = QSqlQuery()
+            backfill_query.prepare("UPDATE galaxies SET file_signature = ? WHERE id = ?")
+            backfill_query.addBindValue([entry["signature"] for _, entry in backfilled])
+            backfill_query.addBindValue([galaxy_id for galaxy_id, _ in backfilled])
+            ok = backfill_query.execBatch()
+        if ok and sdss_changed:
+            sdss_query = QSqlQuery()
+            sdss_query.prepare("UPDATE galaxies SET sdss_file_path = ? WHERE id = ?")
+            sdss_query.addBindValue([path for _, path in sdss_changed])
+            sdss_query.addBindValue([galaxy_id for galaxy_id, _ in sdss_changed])
+            ok = sdss_query.execBatch()
+        if ok and retired:
+            retire_query = QSqlQuery()
+            retire_query.prepare("UPDATE galaxies SET status = ? WHERE id = ?")
+            retire_query.addBindValue([STATUS_RETIRED] * len(retired))
+            retire_query.addBindValue(retired)
+            ok = retire_query.execBatch()
+        if not ok:
+            print(__file__, "catalogue sync failed, rolling back")
+            con.rollback()
+            return
+        con.commit()
+
+    elapsed = time.perf_counter() - start
+    print(f"Catalogue sync: {len(added)} added, {len(changed)} updated, {len(retired)} retired, "
+          f"{len(sdss_changed)} SDSS cutouts changed "
+          f"({len(catalogue)} galaxies scanned in {elapsed:.2f} s)")
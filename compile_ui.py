@@ -0,0 +1,26 @@
+"""Precompile mainwindow.ui into ui_mainwindow.py so the inspector does not parse XML at startup.
+
+    python compile_ui.py
+
+Run it again after editing mainwindow.ui in Qt Designer; until then MainWindow notices the
+hash mismatch and falls back to loading the .ui file at runtime.
+"""
+import hashlib
+
+from PyQt5 import uic
+
+UI_FILE = "mainwindow.ui"
+OUTPUT_FILE = "ui_mainwindow.py"
+
+
+def main():
+    with open(UI_FILE, 'rb') as fd:
+        ui_hash = hashlib.sha1(fd.read()).hexdigest()
+    with open(OUTPUT_FILE, 'w') as fd:
+        uic.compileUi(UI_FILE, fd)
+        fd.write(f'\n\nUI_SOURCE_HASH = "{ui_hash}"\n')
+    print(f"Wrote {OUTPUT_FILE} from {UI_FILE} ({ui_hash[:12]})")
+
+
+if __name__ == '__main__':
+    main()
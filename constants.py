@@ -0,0 +1,21 @@
+# Values shared by the inspector and the command line tools; importing this module must stay free of Qt
+
+DB_NAME = "galaxy.sqlite"
+# WAL lets inspectors read while another one commits, but needs shared memory on a single host;
+# set this to "DELETE" when galaxy.sqlite lives on a network drive used from several machines
+JOURNAL_MODE = "WAL"
+BUSY_TIMEOUT_MS = 5000  # how long a connection waits for another inspector's write lock
+
+LEASE_SECONDS = 15 * 60  # a claimed galaxy goes back to the others if its inspector is gone this long
+
+STATUS_PENDING = 0
+STATUS_DONE = 1
+STATUS_RETIRED = 2  # its files disappeared from the data directories
+
+SPECTRUM_STORE_PATH = "data/spectra"  # spectra.bin holds the packed arrays, spectra.json the offset index
+
+IMAGE_PATH_BEAMS = "data/beams"
+IMAGE_PATH_SYNTHESIS = "data/synthesis"
+IMAGE_PATH_SDSS = "data/SDSS"
+SDSS_THUMBNAIL_PATH = "data/sdss_thumbnails"  # display-size copies of the cutouts, named by content hash
+MANIFEST_PATH = "data/manifest.jsonl"  # written by ingest.py, read instead of scanning when bootstrapping
@@ -0,0 +1,61 @@
+import numpy as np
+
+PYRAMID_MIN_POINTS = 2048
+
+
+def minmax_decimate(x, y, buckets):
+    """Reduce y to the minimum and maximum of each of `buckets` slices, in x order.
+
+    Every extreme value survives, so single-channel RFI spikes stay visible however far the
+    spectrum is reduced. The slices differ in length by at most one channel, so no part of the
+    spectrum is drawn coarser than the rest, and the first and last samples are always kept so the
+    line spans the whole range. Inputs that already fit into 2 * buckets points are returned unchanged.
+    """
+    n = len(y)
+    if buckets < 1 or n <= 2 * buckets:
+        return x, y
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    # slices one channel short repeat their last channel, which changes neither extreme
+    cols = np.minimum(edges[:-1, None] + np.arange(np.diff(edges).max()), edges[1:, None] - 1)
+    blocks = y[cols]
+    lo = np.take_along_axis(cols, blocks.argmin(axis=1)[:, None], axis=1)[:, 0]
+    hi = np.take_along_axis(cols, blocks.argmax(axis=1)[:, None], axis=1)[:, 0]
+    idx = np.column_stack((np.minimum(lo, hi), np.maximum(lo, hi))).ravel()
+    idx = np.concatenate(([0], idx, [n - 1]))
+    # already in order; only a flat slice repeats a channel
+    idx = idx[np.concatenate(([True], idx[1:] != idx[:-1]))]
+    return x[idx], y[idx]
+
+
+class SpectrumPyramid:
+    """A spectrum together with successively halved min/max reductions of it.
+
+    view() picks the coarsest level that still has at least two points per pixel of the
+    requested frequency range, so a full-width plot touches a few thousand points while a
+    zoomed-in plot reads the full resolution channels of the visible range only.
+    """
+
+    def __init__(self, freq, flux, min_points=PYRAMID_MIN_POINTS):
+        if len(freq) > 1 and freq[0] > freq[-1]:
+            # searchsorted needs ascending frequencies; reversed views cost no copy
+            freq, flux = freq[::-1], flux[::-1]
+        self.freq = freq
+        self.flux = flux
+        self.levels = [(freq, flux)]
+        while len(self.levels[-1][1]) > 2 * min_points:
+            x, y = self.levels[-1]
+            self.levels.append(minmax_decimate(x, y, len(y) // 4))
+
+    @property
+    def nbytes(self):
+        return sum(x.nbytes + y.nbytes for x, y in self.levels[1:])
+
+    def view(self, x0=None, x1=None, pixels=1000):
+        """Return (freq, flux) covering [x0, x1] with roughly 2 * pixels points."""
+        for x, y in reversed(self.levels):
+            start = 0 if x0 is None else np.searchsorted(x, x0, side='left')
+            stop = len(x) if x1 is None else np.searchsorted(x, x1, side='right')
+            # keep one neighbour on each side so the line runs to the edges of the axes
+            start, stop = max(start - 1, 0), min(stop + 1, len(x))
+            if stop - start >= 2 * pixels or (x is self.freq):
+                return minmax_decimate(x[start:stop], y[start:stop], pixels)
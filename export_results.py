@@ -0,0 +1,343 @@
+"""Export inspection results joined with their galaxies, and summarise the flags.
+
+    python export_results.py results.parquet
+    python export_results.py results.csv --incremental --summary summary.json
+
+The results table is read in chunks of --chunk-rows rows straight into NumPy columns, so memory
+use does not grow with the table. The format follows the extension: .csv, .parquet (needs
+pyarrow) or .fits. With --incremental only results added since the previous incremental run are
+exported, into <name>.<first id>-<last id>.<ext> next to the output; the last exported id is kept
+in <output>.state.json.
+
+The summary always covers the whole table: how often each flag value was given per beam and, for
+galaxies inspected more than once, how well the inspectors agree (mean pairwise agreement and
+Fleiss' kappa per flag), both counting only the beams the galaxy has.
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from constants import DB_NAME
+
+CHUNK_ROWS = 50000
+
+FLAG_COLUMNS = [
+    "beam1_rfi_flag", "beam1_ripple_flag",
+    "beam2_rfi_flag", "beam2_ripple_flag",
+    "beam3_rfi_flag", "beam3_ripple_flag",
+    "beam4_rfi_flag", "beam4_ripple_flag",
+    "synthesis_signal_flag", "synthesis_baseline_flag",
+]
+FLAG_VALUES = 4  # 0 (not set) to 3
+# the beam each flag belongs to, counted from 0; -1 for the synthesis flags every galaxy has
+FLAG_BEAMS = np.array([int(name[4]) - 1 if name.startswith("beam") else -1 for name in FLAG_COLUMNS])
+
+# (name, NumPy dtype, FITS format); None as the format marks a string column
+COLUMNS = [
+    ("result_id", np.int64, "K"),
+    ("galaxy_id", np.int64, "K"),
+    ("galaxy_name", str, None),
+    ("beams", np.int16, "I"),
+    ("status", np.int16, "I"),
+] + [(name, np.int16, "I") for name in FLAG_COLUMNS] + [
+    ("synthesis_file_path", str, None),
+    ("sdss_file_path", str, None),
+]
+
+# galaxies whose files vanished and came back have several rows; the latest one is current
+EXPORT_QUERY = f"""
+    SELECT
+        r.id,
+        COALESCE(g.id, -1),
+        r.galaxy_name,
+        (SELECT COUNT(*) FROM beams AS b WHERE b.galaxy_id = g.id),
+        COALESCE(g.status, -1),
+        {", ".join("r." + name for name in FLAG_COLUMNS)},
+        COALESCE(g.synthesis_file_path, ''),
+        COALESCE(g.sdss_file_path, '')
+    FROM results AS r
+    LEFT JOIN galaxies AS g ON g.id = (SELECT MAX(id) FROM galaxies WHERE galaxy_name = r.galaxy_name)
+    WHERE r.id > ? AND r.id <= ?
+    ORDER BY r.id
+    """
+
+
+def read_chunks(con, first_id, last_id, chunk_rows=CHUNK_ROWS):
+    """Yield {column: array} for the results with first_id < id <= last_id, chunk_rows at a time."""
+    cursor = con.execute(EXPORT_QUERY, (first_id, last_id))
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            return
+        yield {name: np.array(values, dtype=dtype) for (name, dtype, _), values in zip(COLUMNS, zip(*rows))}
+
+
+class CsvWriter:
+    def __init__(self, path):
+        self._fd = open(path, 'w', newline='')
+        self._writer = csv.writer(self._fd)
+        self._writer.writerow([name for name, _, _ in COLUMNS])
+
+    def write(self, columns):
+        self._writer.writerows(zip(*(columns[name].tolist() for name, _, _ in COLUMNS)))
+
+    def close(self):
+        self._fd.close()
+
+
+class ParquetWriter:
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._schema = pa.schema([(name, pa.string() if dtype is str else pa.from_numpy_dtype(dtype))
+                                  for name, dtype, _ in COLUMNS])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, columns):
+        # each chunk becomes one row group
+        table = self._pa.Table.from_arrays([self._pa.array(columns[name]) for name in self._schema.names],
+                                           schema=self._schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        self._writer.close()
+
+
+class FitsWriter:
+    """Writes a binary table HDU row chunk by row chunk.
+
+    A FITS header states the row count and the width of every string column before the data, so
+    both are queried up front and the records are then streamed as big-endian bytes.
+    """
+
+    BLOCK = 2880
+
+    def __init__(self, path, rows, string_widths):
+        from astropy.io import fits
+        self.rows = rows
+        self.written = 0
+        fields, fits_columns = [], []
+        for name, dtype, fits_format in COLUMNS:
+            if dtype is str:
+                width = max(string_widths[name], 1)
+                fields.append((name, f"S{width}"))
+                fits_columns.append(fits.Column(name=name, format=f"{width}A"))
+            else:
+                fields.append((name, np.dtype(dtype).newbyteorder('>')))
+                fits_columns.append(fits.Column(name=name, format=fits_format))
+        self.dtype = np.dtype(fields)
+        header = fits.BinTableHDU.from_columns(fits_columns, nrows=0).header
+        header["NAXIS2"] = rows
+        self._fd = open(path, 'wb')
+        self._fd.write(fits.PrimaryHDU().header.tostring().encode("ascii"))
+        self._fd.write(header.tostring().encode("ascii"))
+        self._data_start = self._fd.tell()
+
+    def write(self, columns):
+        records = np.empty(len(columns["result_id"]), dtype=self.dtype)
+        for name, dtype, _ in COLUMNS:
+            values = columns[name]
+            records[name] = np.char.encode(values, "utf-8") if dtype is str else values
+        self._fd.write(records.tobytes())
+        self.written += len(records)
+
+    def close(self):
+        if self.written != self.rows:
+            raise RuntimeError(f"FITS header promised {self.rows} rows, {self.written} were written")
+        size = self._fd.tell() - self._data_start
+        self._fd.write(b"\0" * (-size % self.BLOCK))
+        self._fd.close()
+
+
+def open_writer(con, path, first_id, last_id):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return CsvWriter(path)
+    if extension == ".parquet":
+        return ParquetWriter(path)
+    if extension in (".fits", ".fit"):
+        rows = con.execute("SELECT COUNT(*) FROM results WHERE id > ? AND id <= ?", (first_id, last_id)).fetchone()[0]
+        # the byte length of the longest value, as FITS stores UTF-8 bytes; for the paths this is
+        # taken over all galaxies, which is simpler and at worst a little wide
+        string_widths = {
+            "galaxy_name": con.execute("SELECT MAX(LENGTH(CAST(galaxy_name AS BLOB))) FROM results "
+                                       "WHERE id > ? AND id <= ?", (first_id, last_id)).fetchone()[0] or 1,
+        }
+        for name in ("synthesis_file_path", "sdss_file_path"):
+            string_widths[name] = con.execute(
+                f"SELECT MAX(LENGTH(CAST({name} AS BLOB))) FROM galaxies").fetchone()[0] or 1
+        return FitsWriter(path, rows, string_widths)
+    raise ValueError(f"Unknown export format {extension!r}; use .csv, .parquet or .fits")
+
+
+def flag_distribution(con, chunk_rows=CHUNK_ROWS):
+    """counts[flag, value] over all results, skipping the beam flags of beams a galaxy does not have."""
+    counts = np.zeros((len(FLAG_COLUMNS), FLAG_VALUES), dtype=np.int64)
+    last_id = con.execute("SELECT COALESCE(MAX(id), 0) FROM results").fetchone()[0]
+    for columns in read_chunks(con, 0, last_id, chunk_rows):
+        for i, name in enumerate(FLAG_COLUMNS):
+            values = columns[name]
+            if name.startswith("beam"):
+                beam = int(name[4]) - 1
+                values = values[columns["beams"] > beam]
+            counts[i] += np.bincount(np.clip(values, 0, FLAG_VALUES - 1), minlength=FLAG_VALUES)
+    return counts
+
+
+def _agreement_chunks(con, chunk_rows):
+    """Yield (galaxy_names, beams, flags) for galaxies with several results; no galaxy spans two chunks."""
+    cursor = con.execute(
+        f"""
+        SELECT
+            r.galaxy_name,
+            (SELECT COUNT(*) FROM beams AS b
+             WHERE b.galaxy_id = (SELECT MAX(id) FROM galaxies WHERE galaxy_name = r.galaxy_name)),
+            {", ".join("r." + name for name in FLAG_COLUMNS)}
+        FROM results AS r
+        WHERE r.galaxy_name IN (SELECT galaxy_name FROM results GROUP BY galaxy_name HAVING COUNT(*) > 1)
+        ORDER BY r.galaxy_name
+        """
+    )
+    carry = []
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        rows = carry + rows
+        # the last galaxy may continue in the next chunk
+        last_name = rows[-1][0]
+        split = len(rows)
+        while split > 0 and rows[split - 1][0] == last_name:
+            split -= 1
+        rows, carry = rows[:split], rows[split:]
+        if rows:
+            yield _agreement_arrays(rows)
+    if carry:
+        yield _agreement_arrays(carry)
+
+
+def _agreement_arrays(rows):
+    return (np.array([row[0] for row in rows]), np.array([row[1] for row in rows], dtype=np.int64),
+            np.array([row[2:] for row in rows], dtype=np.int64))
+
+
+def inspector_agreement(con, chunk_rows=CHUNK_ROWS):
+    """Mean pairwise agreement and Fleiss' kappa per flag over galaxies inspected more than once."""
+    galaxies = 0
+    flag_galaxies = np.zeros(len(FLAG_COLUMNS))
+    agreement_sum = np.zeros(len(FLAG_COLUMNS))
+    value_totals = np.zeros((len(FLAG_COLUMNS), FLAG_VALUES))
+    for names, beams, flags in _agreement_chunks(con, chunk_rows):
+        _, galaxy = np.unique(names, return_inverse=True)
+        n_galaxies = galaxy.max() + 1
+        # the 0 flags of beams a galaxy does not have would count as agreement
+        present = beams[:, None] > FLAG_BEAMS
+        # votes[galaxy, flag, value]: how many results gave the flag that value
+        votes = np.zeros((n_galaxies, len(FLAG_COLUMNS), FLAG_VALUES))
+        flag_index = np.broadcast_to(np.arange(len(FLAG_COLUMNS)), flags.shape)
+        np.add.at(votes, (galaxy[:, None], flag_index, np.clip(flags, 0, FLAG_VALUES - 1)), present)
+        raters = votes.sum(axis=2)
+        rated = raters > 1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            agreement = (votes * (votes - 1)).sum(axis=2) / (raters * (raters - 1))
+        agreement_sum += np.where(rated, agreement, 0).sum(axis=0)
+        flag_galaxies += rated.sum(axis=0)
+        value_totals += votes.sum(axis=0)
+        galaxies += n_galaxies
+    if not galaxies:
+        return {"galaxies": 0}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        observed = agreement_sum / flag_galaxies
+        shares = value_totals / value_totals.sum(axis=1, keepdims=True)
+        expected = (shares ** 2).sum(axis=1)
+        kappa = np.where(expected < 1, (observed - expected) / (1 - expected), 1.0)
+    # flags of beams no galaxy inspected more than once has get no statistics
+    return {
+        "galaxies": int(galaxies),
+        "flags": {name: {"galaxies": int(flag_galaxies[i]),
+                         "agreement": float(observed[i]) if flag_galaxies[i] else None,
+                         "fleiss_kappa": float(kappa[i]) if flag_galaxies[i] else None}
+                  for i, name in enumerate(FLAG_COLUMNS)},
+    }
+
+
+def summarise(con, chunk_rows=CHUNK_ROWS):
+    counts = flag_distribution(con, chunk_rows)
+    return {
+        "results": int(con.execute("SELECT COUNT(*) FROM results").fetchone()[0]),
+        "flag_distribution": {name: counts[i].tolist() for i, name in enumerate(FLAG_COLUMNS)},
+        "agreement": inspector_agreement(con, chunk_rows),
+    }
+
+
+def print_summary(summary):
+    print(f"{summary['results']} results")
+    print(f"{'flag':<26}" + "".join(f"{'= ' + str(value):>9}" for value in range(FLAG_VALUES)))
+    for name, counts in summary["flag_distribution"].items():
+        print(f"{name:<26}" + "".join(f"{count:>9}" for count in counts))
+    agreement = summary["agreement"]
+    if agreement["galaxies"]:
+        print(f"Agreement over {agreement['galaxies']} galaxies inspected more than once:")
+        for name, stats in agreement["flags"].items():
+            if stats["galaxies"]:
+                print(f"{name:<26}{stats['agreement']:>9.3f}  kappa {stats['fleiss_kappa']:.3f}"
+                      f"  ({stats['galaxies']} galaxies)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", help="file to export to: .csv, .parquet or .fits")
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--incremental", action="store_true", help="only export results added since the last run")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--summary", metavar="PATH", help="also write the flag summary as JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    con = sqlite3.connect(args.db)
+    # results saved while we export are left for the next incremental run
+    last_id = con.execute("SELECT COALESCE(MAX(id), 0) FROM results").fetchone()[0]
+    state_path = args.output + ".state.json"
+    first_id = 0
+    output = args.output
+    if args.incremental:
+        if os.path.exists(state_path):
+            with open(state_path) as fd:
+                first_id = json.load(fd)["last_result_id"]
+        base, extension = os.path.splitext(args.output)
+        output = f"{base}.{first_id + 1}-{last_id}{extension}"
+
+    if last_id > first_id:
+        try:
+            writer = open_writer(con, output, first_id, last_id)
+        except (ValueError, ImportError) as e:
+            parser.error(str(e))
+        rows = 0
+        for columns in read_chunks(con, first_id, last_id, args.chunk_rows):
+            writer.write(columns)
+            rows += len(columns["result_id"])
+        writer.close()
+        if args.incremental:
+            with open(state_path + ".tmp", 'w') as fd:
+                json.dump({"last_result_id": last_id}, fd)
+            os.replace(state_path + ".tmp", state_path)
+        print(f"Exported {rows} results to {output} in {time.perf_counter() - start:.2f} s")
+    else:
+        print("No new results to export")
+
+    summary = summarise(con, args.chunk_rows)
+    con.close()
+    print_summary(summary)
+    if args.summary:
+        with open(args.summary, 'w') as fd:
+            json.dump(summary, fd, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""Compute spectral quality features of every galaxy and rank the inspection queue by them.
+
+    python features.py --workers 8
+
+Per beam: the RMS of the TABL spectrum, the number of spikes standing out of the smoothed
+baseline (an RFI proxy) and the share of power in baseline ripples found by an FFT. Per galaxy:
+the SNR of the strongest feature of the FLUXBL synthesis spectrum. They are stored in the
+beam_features and synthesis_features tables, and combined into galaxies.priority, which the
+inspector claims galaxies by, highest first. Clean beams, strong detections and obvious RFI
+score low; a galaxy is as ambiguous as its most ambiguous beam or its synthesis spectrum.
+Galaxies whose features are up to date with their files are skipped unless --force is given.
+"""
+import argparse
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from constants import BUSY_TIMEOUT_MS, DB_NAME, STATUS_RETIRED
+from spectra import BEAM_FLUX_COLUMN, SYNTHESIS_FLUX_COLUMN
+from spectrum_store import SpectrumStore, load_spectrum
+
+BASELINE_WINDOW = 64  # channels averaged into the baseline that spikes and ripples are measured against
+SPIKE_SIGMA = 6.0
+RIPPLE_CYCLES = (2, 200)  # ripples with this many periods across the band; one period is a tilt
+SNR_WINDOW = 9  # channels, about the width of a narrow HI line
+
+# ambiguity peaks where an inspector has to look twice: (centre, width)
+SNR_AMBIGUOUS = (6.5, 1.5)  # marginal detections; the peak of pure noise over a band is about 4
+SPIKES_AMBIGUOUS = (np.log1p(3), 0.7)  # a few spikes, on log1p(spikes)
+RIPPLE_AMBIGUOUS = (0.3, 0.15)  # some, but not dominating, ripple
+
+COMMIT_EVERY = 50
+
+BEAM_FEATURES_TABLE = """
+    CREATE TABLE IF NOT EXISTS beam_features (
+        galaxy_id INTEGER NOT NULL REFERENCES galaxies (id),
+        beam_index INTEGER NOT NULL,
+        rms REAL NOT NULL,
+        spikes INTEGER NOT NULL,
+        ripple_power REAL NOT NULL,
+        size INTEGER NOT NULL,
+        mtime INTEGER NOT NULL,
+        PRIMARY KEY (galaxy_id, beam_index)
+    )
+    """
+
+SYNTHESIS_FEATURES_TABLE = """
+    CREATE TABLE IF NOT EXISTS synthesis_features (
+        galaxy_id INTEGER PRIMARY KEY REFERENCES galaxies (id),
+        snr REAL NOT NULL,
+        size INTEGER NOT NULL,
+        mtime INTEGER NOT NULL
+    )
+    """
+
+_store = None  # opened once per worker process
+
+
+def _robust_sigma(values):
+    return 1.4826 * np.median(np.abs(values - np.median(values)))
+
+
+def _smooth(values, window):
+    return np.convolve(values, np.ones(window) / window, mode='same')
+
+
+def beam_features(flux):
+    """(rms, spikes, ripple_power) of a beam spectrum."""
+    flux = flux[np.isfinite(flux)]
+    centred = flux - flux.mean()
+    rms = float(np.sqrt(np.mean(centred ** 2)))
+    baseline = _smooth(centred, BASELINE_WINDOW)
+    residual = centred - baseline
+    outliers = np.abs(residual) > SPIKE_SIGMA * _robust_sigma(residual)
+    # neighbouring channels hit by the same burst count as one spike
+    spikes = int(np.count_nonzero(outliers[1:] & ~outliers[:-1]) + outliers[0]) if len(outliers) else 0
+    total_power = np.sum(np.abs(np.fft.rfft(centred)) ** 2)
+    ripple = np.abs(np.fft.rfft(baseline - baseline.mean())) ** 2
+    ripple_power = float(ripple[RIPPLE_CYCLES[0]:RIPPLE_CYCLES[1] + 1].sum() / total_power) if total_power else 0.0
+    return rms, spikes, ripple_power
+
+
+def synthesis_snr(flux):
+    flux = flux[np.isfinite(flux)]
+    smoothed = _smooth(flux - np.median(flux), SNR_WINDOW)
+    sigma = _robust_sigma(smoothed)
+    return float(smoothed.max() / sigma) if sigma > 0 else 0.0
+
+
+def _bump(value, centre_width):
+    centre, width = centre_width
+    return float(np.exp(-((value - centre) / width) ** 2))
+
+
+def priority(beams, snr):
+    """How ambiguous a galaxy is, from 0 to 1; beams holds (rms, spikes, ripple_power) per beam."""
+    terms = [_bump(snr, SNR_AMBIGUOUS)]
+    for _, spikes, ripple_power in beams:
+        terms.append(_bump(np.log1p(spikes), SPIKES_AMBIGUOUS))
+        terms.append(_bump(ripple_power, RIPPLE_AMBIGUOUS))
+    return max(terms)
+
+
+def compute_galaxy(task):
+    global _store
+    if _store is None:
+        _store = SpectrumStore()
+    galaxy_id, beams, synthesis = task
+    try:
+        beam_rows = []
+        for beam_index, path, size, mtime in beams:
+            _, flux = load_spectrum(_store, path, BEAM_FLUX_COLUMN)
+            beam_rows.append((galaxy_id, beam_index) + beam_features(flux) + (size, mtime))
+        st = os.stat(synthesis)
+        _, flux = load_spectrum(_store, synthesis, SYNTHESIS_FLUX_COLUMN)
+        synthesis_row = (galaxy_id, synthesis_snr(flux), st.st_size, st.st_mtime_ns)
+    except Exception as e:
+        return galaxy_id, None, None, f"{type(e).__name__}: {e}"
+    return galaxy_id, beam_rows, synthesis_row, None
+
+
+def create_feature_tables(con):
+    con.execute(BEAM_FEATURES_TABLE)
+    con.execute(SYNTHESIS_FEATURES_TABLE)
+    # normally added by the inspector's migrate_database, but this may run first
+    if "priority" not in {row[1] for row in con.execute("PRAGMA table_info(galaxies)")}:
+        con.execute("ALTER TABLE galaxies ADD COLUMN priority REAL DEFAULT 0 NOT NULL")
+    con.commit()
+
+
+def feature_tasks(con, force=False):
+    """(galaxy_id, [(beam_index, path, size, mtime)], synthesis_path) for galaxies whose features are stale."""
+    beams = {}
+    for galaxy_id, beam_index, path, size, mtime in con.execute(
+            "SELECT galaxy_id, beam_index, path, size, mtime FROM beams ORDER BY galaxy_id, beam_index"):
+        beams.setdefault(galaxy_id, []).append((beam_index, path, size, mtime))
+    stale = {galaxy_id for galaxy_id, in con.execute(
+        """
+        SELECT b.galaxy_id
+        FROM beams AS b
+        LEFT JOIN beam_features AS f ON f.galaxy_id = b.galaxy_id AND f.beam_index = b.beam_index
+        WHERE f.galaxy_id IS NULL OR f.size != b.size OR f.mtime != b.mtime
+        """)}
+    tasks = []
+    for galaxy_id, synthesis, size, mtime in con.execute(
+            """
+            SELECT g.id, g.synthesis_file_path, s.size, s.mtime
+            FROM galaxies AS g
+            LEFT JOIN synthesis_features AS s ON s.galaxy_id = g.id
+            WHERE g.status != ?
+            """, (STATUS_RETIRED,)):
+        if not force and galaxy_id not in stale and size is not None:
+            try:
+                st = os.stat(synthesis)
+            except FileNotFoundError:
+                continue
+            if (st.st_size, st.st_mtime_ns) == (size, mtime):
+                continue
+        tasks.append((galaxy_id, beams.get(galaxy_id, []), synthesis))
+    return tasks
+
+
+def write_features(con, computed):
+    """Store (galaxy_id, beam_rows, synthesis_row) of computed galaxies in one short transaction."""
+    with con:
+        con.executemany("DELETE FROM beam_features WHERE galaxy_id = ?", ((galaxy_id,) for galaxy_id, _, _ in computed))
+        con.executemany("INSERT INTO beam_features (galaxy_id, beam_index, rms, spikes, ripple_power, size, mtime) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)", (row for _, beam_rows, _ in computed for row in beam_rows))
+        con.executemany("INSERT OR REPLACE INTO synthesis_features (galaxy_id, snr, size, mtime) VALUES (?, ?, ?, ?)",
+                        (synthesis_row for _, _, synthesis_row in computed))
+        con.executemany("UPDATE galaxies SET priority = ? WHERE id = ?",
+                        ((priority([row[2:5] for row in beam_rows], synthesis_row[1]), galaxy_id)
+                         for galaxy_id, beam_rows, synthesis_row in computed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--force", action="store_true", help="recompute features that are up to date")
+    args = parser.parse_args()
+
+    # inspectors may be claiming galaxies from the same database meanwhile
+    con = sqlite3.connect(args.db, timeout=BUSY_TIMEOUT_MS / 1000)
+    create_feature_tables(con)
+    tasks = feature_tasks(con, args.force)
+    print(f"{len(tasks)} galaxies to analyse, {args.workers} workers")
+
+    start = time.perf_counter()
+    failed = 0
+    computed = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for done, (galaxy_id, beam_rows, synthesis_row, error) in enumerate(
+                executor.map(compute_galaxy, tasks, chunksize=8), 1):
+            if error:
+                failed += 1
+                print(f"Galaxy {galaxy_id} failed: {error}")
+                continue
+            computed.append((galaxy_id, beam_rows, synthesis_row))
+            # rows are only written once a batch is computed, so the write lock the inspectors claim
+            # galaxies with is held for a few milliseconds rather than while the workers run
+            if len(computed) == COMMIT_EVERY:
+                write_features(con, computed)
+                computed = []
+                print(f"[{done}/{len(tasks)}] {done / (time.perf_counter() - start):.0f} galaxies/s", flush=True)
+    write_features(con, computed)
+    con.close()
+    print(f"Analysed {len(tasks) - failed} galaxies, {failed} failed, in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+import os
+import random
+import socket
+import time
+import uuid
+from collections import deque
+
+from PyQt5.QtSql import QSqlQuery
+
+from constants import LEASE_SECONDS, STATUS_PENDING
+
+CLAIM_BATCH = 8
+CLAIM_RETRIES = 5
+
+# outcomes of GalaxyQueue._claim_batch
+CLAIMED, EXHAUSTED, LOCKED = range(3)
+
+
+def inspector_id():
+    """A name for this inspector process that is unique across the machines sharing the database."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class GalaxyQueue:
+    """Pending galaxies, most ambiguous first (see features.py) and then in id order, claimed from
+    the database in batches.
+
+    Several inspectors can share one database: a claim marks galaxies with claimed_by and a lease
+    expiry inside a BEGIN IMMEDIATE transaction, so no two inspectors are handed the same galaxy.
+    Leases of the galaxies held are renewed as the inspector moves on and on a timer (renew());
+    those of an inspector that disappears without releasing them expire after lease_seconds and
+    are claimed by the others. A galaxy claimed by another inspector after its lease lapsed anyway,
+    e.g. while this machine was asleep, is dropped from the queue.
+    """
+
+    def __init__(self, batch_size=CLAIM_BATCH, inspector=None, lease_seconds=LEASE_SECONDS):
+        self.batch_size = batch_size
+        self.inspector = inspector or inspector_id()
+        self.lease_seconds = lease_seconds
+        self.last_renewal = time.time()
+        self._buffer = deque()
+        self._exhausted = False
+        self.locked = False  # the last claim could not get the write lock; pop() returning None is not the end
+
+        self._claim_query = QSqlQuery()
+        self._claim_query.prepare(
+            """
+            UPDATE galaxies SET claimed_by = ?, lease_expires = ?
+            WHERE id IN (
+                SELECT id FROM galaxies
+                WHERE status = ? AND lease_expires < ?
+                ORDER BY priority DESC, id
+                LIMIT ?
+            )
+            """
+        )
+        self._fetch_query = QSqlQuery()
+        self._fetch_query.setForwardOnly(True)
+        # one round trip per batch: the claimed galaxies joined with all of their beams
+        self._fetch_query.prepare(
+            """
+            SELECT g.id, g.galaxy_name, g.synthesis_file_path, g.sdss_file_path, b.path
+            FROM galaxies AS g
+            LEFT JOIN beams AS b ON b.galaxy_id = g.id
+            WHERE g.claimed_by = ? AND g.lease_expires = ? AND g.status = ?
+            ORDER BY g.priority DESC, g.id, b.beam_index
+            """
+        )
+        self._renew_query = QSqlQuery()
+        self._renew_query.prepare("UPDATE galaxies SET lease_expires = ? WHERE claimed_by = ? AND status = ?")
+        self._held_query = QSqlQuery()
+        self._held_query.setForwardOnly(True)
+        self._held_query.prepare("SELECT id FROM galaxies WHERE claimed_by = ? AND status = ?")
+
+    def _exec(self, query, *values):
+        for value in values:
+            query.addBindValue(value)
+        if not query.exec():
+            print(__file__, "db error", query.lastError().text())
+            return False
+        return True
+
+    def _begin_immediate(self):
+        # takes the write lock up front, so two inspectors cannot both read the same free rows
+        # and then claim them; the busy timeout covers short waits, the retries longer ones
+        query = QSqlQuery()
+        for attempt in range(CLAIM_RETRIES):
+            if query.exec("BEGIN IMMEDIATE"):
+                return True
+            time.sleep(random.uniform(0, 0.05 * 2 ** attempt))
+        print(__file__, "could not lock the database:", query.lastError().text())
+        return False
+
+    def _claim_batch(self):
+        if not self._begin_immediate():
+            return LOCKED
+        now = time.time()
+        expires = now + self.lease_seconds
+        ok = self._exec(self._claim_query, self.inspector, expires, STATUS_PENDING, now, self.batch_size)
+        fetched = 0
+        if ok and self._claim_query.numRowsAffected() > 0:
+            ok = self._exec(self._fetch_query, self.inspector, expires, STATUS_PENDING)
+            galaxy = None
+            while ok and self._fetch_query.next():
+                galaxy_id, name, synthesis, sdss, beam = range(5)
+                if galaxy is None or galaxy["id"] != self._fetch_query.value(galaxy_id):
+                    galaxy = {
+                        "id": self._fetch_query.value(galaxy_id),
+                        "galaxy_name": self._fetch_query.value(name),
+                        "beams": [],
+                        "synthesis": self._fetch_query.value(synthesis),
+                        "sdss": self._fetch_query.value(sdss)
+                    }
+                    self._buffer.append(galaxy)
+                    fetched += 1
+                if self._fetch_query.value(beam):
+                    galaxy["beams"].append(self._fetch_query.value(beam))
+            self._fetch_query.finish()
+        QSqlQuery().exec("COMMIT" if ok else "ROLLBACK")
+        if fetched < self.batch_size:
+            self._exhausted = True
+            return EXHAUSTED
+        return CLAIMED
+
+    def renew(self):
+        """Extend the leases of every galaxy this inspector holds and has not finished.
+
+        Returns the ids of those galaxies, or None on a database error. Queued galaxies that are
+        not among them were claimed by another inspector and are dropped.
+        """
+        self.last_renewal = time.time()
+        if not self._exec(self._renew_query, self.last_renewal + self.lease_seconds, self.inspector, STATUS_PENDING):
+            return None
+        # rows claimed by someone else are not touched by the update; the leases just extended
+        # keep the rest from being claimed between the two queries
+        if not self._exec(self._held_query, self.inspector, STATUS_PENDING):
+            return None
+        held = set()
+        while self._held_query.next():
+            held.add(self._held_query.value(0))
+        self._held_query.finish()
+        lost = [galaxy["galaxy_name"] for galaxy in self._buffer if galaxy["id"] not in held]
+        if lost:
+            print(f"Claims lost to other inspectors: {', '.join(lost)}")
+            self._buffer = deque(galaxy for galaxy in self._buffer if galaxy["id"] in held)
+        return held
+
+    def release(self):
+        """Hand the unfinished galaxies held by this inspector back to the others."""
+        self._buffer.clear()
+        query = QSqlQuery()
+        query.prepare("UPDATE galaxies SET claimed_by = '', lease_expires = 0 WHERE claimed_by = ? AND status = ?")
+        self._exec(query, self.inspector, STATUS_PENDING)
+
+    def claimed_by_others(self):
+        """(count, earliest lease expiry) of the pending galaxies other inspectors hold right now."""
+        query = QSqlQuery()
+        query.prepare("SELECT COUNT(*), MIN(lease_expires) FROM galaxies "
+                      "WHERE status = ? AND claimed_by != ? AND lease_expires >= ?")
+        if not self._exec(query, STATUS_PENDING, self.inspector, time.time()) or not query.next():
+            return 0, None
+        return query.value(0), query.value(1) or None
+
+    def peek(self, n):
+        """Return up to n galaxies from the front of the queue without removing them."""
+        self.locked = False
+        while len(self._buffer) < n and not self._exhausted:
+            if self._claim_batch() == LOCKED:
+                # what is queued is handed out; the next call tries again
+                self.locked = True
+                break
+        return [self._buffer[i] for i in range(min(n, len(self._buffer)))]
+
+    def pop(self):
+        if time.time() - self.last_renewal > self.lease_seconds / 3:
+            self.renew()
+        if not self.peek(1) and not self.locked:
+            # leases of other inspectors may have expired since
+            self._exhausted = False
+            self.peek(1)
+        if not self._buffer:
+            return None
+        return self._buffer.popleft()
+
+    def unpop(self, galaxy):
+        """Put a galaxy returned by pop, and still held by this inspector, back at the front."""
+        self._buffer.appendleft(galaxy)
@@ -0,0 +1,121 @@
+"""Move a survey drop of FITS files into data/beams and data/synthesis and record them in a manifest.
+
+    python ingest.py --source ../data/data --workers 16
+
+Beam files (AGC<galaxy>_M<beam>_file<file>.fits) and synthesis files (AGC<galaxy>.fits) are
+moved with os.rename where source and destination share a filesystem, otherwise copied,
+verified and then removed from the source. Every file that lands in a data directory is
+appended to the manifest, which init_database reads instead of scanning the directories.
+Running the command again only processes what is still left in the source directory.
+"""
+import argparse
+import errno
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from catalogue import parse_file_name
+from constants import IMAGE_PATH_BEAMS, IMAGE_PATH_SYNTHESIS, MANIFEST_PATH
+
+COPY_BUFFER = 4 * 1024 * 1024
+
+
+def _same_contents(a, b):
+    with open(a, 'rb') as fa, open(b, 'rb') as fb:
+        while True:
+            block = fa.read(COPY_BUFFER)
+            if block != fb.read(COPY_BUFFER):
+                return False
+            if not block:
+                return True
+
+
+def move_file(source, destination, verify_contents=False):
+    """Move source to destination, copying across filesystems; returns the destination's stat."""
+    if os.path.exists(destination):
+        raise FileExistsError(destination)
+    try:
+        os.rename(source, destination)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        tmp = destination + ".part"
+        shutil.copy2(source, tmp)
+        if os.path.getsize(tmp) != os.path.getsize(source) or (verify_contents and not _same_contents(source, tmp)):
+            os.remove(tmp)
+            raise OSError(f"copy of {source} does not match the original")
+        os.replace(tmp, destination)
+        os.remove(source)
+    return os.stat(destination)
+
+
+def discover(source_dir, beams_dir, synthesis_dir):
+    """Yield (source_path, destination_path, parsed_name) for every survey file in source_dir."""
+    with os.scandir(source_dir) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            parsed = parse_file_name(entry.name)
+            if parsed is None:
+                continue
+            target_dir = beams_dir if parsed[0] == "beam" else synthesis_dir
+            yield entry.path, os.path.join(target_dir, entry.name), parsed
+
+
+def _manifest_record(destination, parsed, st):
+    record = {"kind": parsed[0], "galaxy": parsed[1], "path": destination, "size": st.st_size,
+              "mtime": st.st_mtime_ns}
+    if parsed[0] == "beam":
+        record["beam"] = parsed[2]
+        record["file"] = parsed[3]
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default="../data/data")
+    parser.add_argument("--beams", default=IMAGE_PATH_BEAMS)
+    parser.add_argument("--synthesis", default=IMAGE_PATH_SYNTHESIS)
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--verify-contents", action="store_true",
+                        help="compare copied files byte by byte, not only by size")
+    parser.add_argument("--dry-run", action="store_true", help="list what would be moved")
+    args = parser.parse_args()
+
+    os.makedirs(args.beams, exist_ok=True)
+    os.makedirs(args.synthesis, exist_ok=True)
+    files = list(discover(args.source, args.beams, args.synthesis))
+    print(f"{len(files)} survey files found in {args.source}")
+    if args.dry_run:
+        for source, destination, _ in files:
+            print(f"{source} -> {destination}")
+        return
+
+    start = time.perf_counter()
+    moved = failed = 0
+    with open(args.manifest, 'a') as manifest, ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(move_file, source, destination, args.verify_contents): (source, destination, parsed)
+                   for source, destination, parsed in files}
+        for future in as_completed(futures):
+            source, destination, parsed = futures[future]
+            try:
+                st = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"Failed to move {source}: {type(e).__name__}: {e}")
+                continue
+            # written as soon as the move is done, so an interrupted run leaves a usable manifest
+            manifest.write(json.dumps(_manifest_record(destination, parsed, st)) + "\n")
+            moved += 1
+            if moved % 1000 == 0:
+                manifest.flush()
+                print(f"{moved}/{len(files)} moved ({moved / (time.perf_counter() - start):.0f} files/s)", flush=True)
+
+    print(f"Moved {moved} files, {failed} failed, in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
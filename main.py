@@ -1,23 +1,34 @@
-import os
+import argparse
+import signal
 import sys
-from collections import defaultdict
-
-from astropy.table import Table
-
+import time
+from os.path import getsize, isfile
+
+if __name__ == '__main__' and "--profile-startup" in sys.argv:
+    # installed before the imports below so that they are measured too
+    from startup_profile import StartupProfiler
+    startup_profiler = StartupProfiler()
+    startup_profiler.install()
+else:
+    startup_profiler = None
+
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtSql import QSqlDatabase, QSqlQuery
 from PyQt5.QtWidgets import QMessageBox
 
 from MainWindow import MainWindow
-
-IMAGE_PATH_BEAMS = "data/beams"
-IMAGE_PATH_SYNTHESIS = "data/synthesis"
-IMAGE_PATH_SDSS = "data/SDSS"
+from catalogue import attach_sdss, read_manifest, scan_catalogue
+from catalogue_sync import insert_galaxies, sync_catalogue
+from constants import (BUSY_TIMEOUT_MS, DB_NAME, IMAGE_PATH_BEAMS, IMAGE_PATH_SDSS, IMAGE_PATH_SYNTHESIS, JOURNAL_MODE,
+                       MANIFEST_PATH)
+from memory_watchdog import DEFAULT_CEILING_MB
+from schema import create_indexes, create_tables, migrate_database
+from tracing import tracer
 
 
 def sqlite_db_already_exists():
-    db_name = "galaxy.sqlite"
-    from os.path import isfile, getsize
+    db_name = DB_NAME
     if not isfile(db_name):
         return False
     if getsize(db_name) < 100:  # SQLite database file header is 100 bytes
@@ -28,37 +39,18 @@ def sqlite_db_already_exists():
 
 
 def readData():
-    beam_dict = defaultdict(list)
-    beam_files = os.listdir(IMAGE_PATH_BEAMS)
-    for beam in beam_files:
-        if beam == '.DS_Store':  # ignore the auto generated file on Mac
-            continue
-        galaxy_name = beam.split("_")[0]
-        beam_path = os.path.join(IMAGE_PATH_BEAMS, beam)
-        beam_dict[galaxy_name].append(beam_path)
-
-    synthesis_dict = {}
-    synthesis_files = os.listdir(IMAGE_PATH_SYNTHESIS)
-    for file_name in synthesis_files:
-        if file_name == '.DS_Store':  # ignore the auto generated file on Mac
-            continue
-        galaxy_name = file_name.removesuffix(".fits")
-        file_path = os.path.join(IMAGE_PATH_SYNTHESIS, file_name)
-        synthesis_dict[galaxy_name] = file_path
-
-    rows = []
-    for key in beam_dict.keys():
-        beams = list(beam_dict[key])
-        s = synthesis_dict[key]
-        rows.append((key, beams, s, ""))
-
-    t = Table(rows=rows, names=['galaxy', 'beams', 'synthesis', 'sdss'])
-    return t
+    # files that reach the data directories some other way are picked up by the next sync
+    if isfile(MANIFEST_PATH):
+        print(f"Reading the catalogue from {MANIFEST_PATH}")
+        return attach_sdss(read_manifest(MANIFEST_PATH, IMAGE_PATH_SYNTHESIS), IMAGE_PATH_SDSS)
+    return scan_catalogue(IMAGE_PATH_BEAMS, IMAGE_PATH_SYNTHESIS, IMAGE_PATH_SDSS)
 
 
 def createConnection():
     con = QSqlDatabase.addDatabase("QSQLITE")
-    con.setDatabaseName("galaxy.sqlite")
+    con.setDatabaseName(DB_NAME)
+    # other inspectors may hold the write lock for a moment while they claim or commit
+    con.setConnectOptions(f"QSQLITE_BUSY_TIMEOUT={BUSY_TIMEOUT_MS}")
     if not con.open():
         QMessageBox.critical(None,
                              "Citizen Scientist Project Error!",
@@ -68,62 +60,63 @@ def createConnection():
 
 
 def init_database():
-    createTableQuery = QSqlQuery()
-    createTableQuery.exec(
-        """
-        CREATE TABLE galaxies (
-            id INTEGER PRIMARY KEY AUTOINCREMENT UNIQUE,
-            galaxy_name TEXT NOT NULL,
-            beam_file_path TEXT NOT NULL ,
-            synthesis_file_path TEXT NOT NULL,
-            sdss_file_path TEXT NOT NULL 
-        )
-        """
-    )
-    userSelectionQuery = QSqlQuery()
-    userSelectionQuery.exec(
-        """
-        CREATE TABLE results (
-        id INTEGER PRIMARY KEY AUTOINCREMENT UNIQUE,
-        galaxy_name TEXT NOT NULL,
-        beam1_rfi_flag INTEGER DEFAULT 0 NOT NULL ,
-        beam1_ripple_flag INTEGER DEFAULT 0 NOT NULL ,
-        beam2_rfi_flag INTEGER DEFAULT 0 NOT NULL,
-        beam2_ripple_flag INTEGER DEFAULT 0 NOT NULL,
-        beam3_rfi_flag INTEGER DEFAULT 0 NOT NULL,
-        beam3_ripple_flag INTEGER DEFAULT 0 NOT NULL,
-        beam4_rfi_flag INTEGER DEFAULT 0 NOT NULL,
-        beam4_ripple_flag INTEGER DEFAULT 0 NOT NULL,
-        synthesis_signal_flag INTEGER DEFAULT 0 NOT NULL,
-        synthesis_baseline_flag INTEGER DEFAULT 0 NOT NULL
-        )
-        """
-    )
-
-    insertDataQuery = QSqlQuery()
-    insertDataQuery.prepare(
-        """
-        INSERT INTO galaxies (
-            galaxy_name,
-            beam_file_path,
-            synthesis_file_path,
-            sdss_file_path
-        )
-        VALUES (:galaxy_name,:beam_file_path,:synthesis_file_path,:sdss_file_path)
-        """
-    )
-
-    dataTable = readData()
-    for row in dataTable:
-        insertDataQuery.bindValue(":galaxy_name", str(row['galaxy']))
-        insertDataQuery.bindValue(":beam_file_path", str(row['beams']))
-        insertDataQuery.bindValue(":synthesis_file_path", str(row['synthesis']))
-        insertDataQuery.bindValue(":sdss_file_path", str(row['sdss']))
-        insertDataQuery.exec()
+    create_tables()
+
+    start = time.perf_counter()
+    catalogue = readData()
+    con = QSqlDatabase.database()
+    pragmaQuery = QSqlQuery()
+    # the database file is rebuilt from the FITS files if the load is interrupted, so durability
+    # is traded for speed until the single commit below
+    pragmaQuery.exec(f"PRAGMA journal_mode = {JOURNAL_MODE}")
+    pragmaQuery.exec("PRAGMA synchronous = OFF")
+    pragmaQuery.exec("PRAGMA temp_store = MEMORY")
+    pragmaQuery.exec("PRAGMA cache_size = -65536")
+    con.transaction()
+    if not insert_galaxies(list(catalogue.items())):
+        con.rollback()
+        return
+    con.commit()
+    # indexes are built once over the loaded rows instead of being updated on every insert
+    create_indexes()
+    pragmaQuery.exec("PRAGMA synchronous = NORMAL")
+
+    elapsed = time.perf_counter() - start
+    print(f"Loaded {len(catalogue)} galaxies in {elapsed:.2f} s "
+          f"({len(catalogue) / max(elapsed, 1e-9):.0f} rows/s)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Galaxy Inspector")
+    parser.add_argument("--profile-startup", action="store_true", help="print where startup time goes")
+    parser.add_argument("--trace-json", metavar="PATH", help="record hot path spans and write them as JSON on exit")
+    parser.add_argument("--trace-chrome", metavar="PATH", help="record hot path spans as a Chrome trace")
+    parser.add_argument("--memory-ceiling", type=int, default=DEFAULT_CEILING_MB, metavar="MB",
+                        help="trim caches when the process grows past this much resident memory")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="start tracemalloc right away; Ctrl+Shift+M prints where memory goes")
+    parser.add_argument("--fast", action="store_true",
+                        help="set the flags from the keyboard and move on with Enter, without confirming each galaxy")
+    # everything else is left for QApplication
+    return parser.parse_known_args()
+
+
+def report_startup():
+    startup_profiler.stage("first event loop pass")
+    startup_profiler.report()
 
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
+    if startup_profiler:
+        startup_profiler.stage("imports")
+    args, qt_args = parse_args()
+    tracer.enabled = bool(args.trace_json or args.trace_chrome)
+    if args.trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+    app = QApplication(sys.argv[:1] + qt_args)
+    if startup_profiler:
+        startup_profiler.stage("QApplication")
 
     if not createConnection():
         print("Unable to connect to the database")
@@ -132,8 +125,30 @@ if __name__ == '__main__':
     if not sqlite_db_already_exists():
         print("Create a new database")
         init_database()
-
-    main_window = MainWindow()
+    else:
+        migrate_database()
+        sync_catalogue(IMAGE_PATH_BEAMS, IMAGE_PATH_SYNTHESIS, IMAGE_PATH_SDSS)
+    if startup_profiler:
+        startup_profiler.stage("database")
+
+    main_window = MainWindow(memory_ceiling_mb=args.memory_ceiling, fast_mode=args.fast)
+    if startup_profiler:
+        startup_profiler.stage("main window")
     main_window.show()
-
-    sys.exit(app.exec())
+    # a terminated session hands its claimed galaxies back like a closed one; the timer lets the
+    # Python handler run while Qt's event loop has control
+    signal.signal(signal.SIGTERM, lambda *_: main_window.close())
+    signal_timer = QTimer()
+    signal_timer.timeout.connect(lambda: None)
+    signal_timer.start(500)
+    if startup_profiler:
+        QTimer.singleShot(0, report_startup)
+
+    exit_code = app.exec()
+    if tracer.enabled:
+        tracer.print_summary()
+        if args.trace_json:
+            tracer.export_json(args.trace_json)
+        if args.trace_chrome:
+            tracer.export_chrome_trace(args.trace_chrome)
+    sys.exit(exit_code)
@@ -0,0 +1,78 @@
+"""Keeps the inspector's resident memory under a ceiling during long sessions.
+
+A timer compares the resident set size with the ceiling and calls back into the window to trim
+its caches when it is exceeded. report() prints where Python memory goes using tracemalloc: the
+first call starts tracing, later calls list the largest allocation sites and their growth since
+the previous report.
+"""
+import gc
+import os
+import tracemalloc
+
+from PyQt5.QtCore import QObject, QTimer
+
+DEFAULT_CEILING_MB = 2048
+CHECK_INTERVAL_MS = 10000
+REPORT_LINES = 15
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm") as fd:
+            return int(fd.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+class MemoryWatchdog(QObject):
+    def __init__(self, trim, ceiling_mb=DEFAULT_CEILING_MB, interval_ms=CHECK_INTERVAL_MS, parent=None):
+        super(MemoryWatchdog, self).__init__(parent)
+        self.trim = trim  # callable that releases what the window can do without
+        self.ceiling = ceiling_mb * 1024 ** 2
+        self.interval_ms = interval_ms
+        self.trims = 0
+        self._snapshot = None
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.check)
+
+    def start(self):
+        if current_rss() is None:
+            print("Memory watchdog disabled: the resident set size cannot be read here (install psutil)")
+            return
+        self._timer.start(self.interval_ms)
+
+    def check(self):
+        rss = current_rss()
+        if rss is None or rss <= self.ceiling:
+            return
+        self.trims += 1
+        self.trim()
+        gc.collect()
+        print(f"Memory watchdog: {rss / 1024 ** 2:.0f} MB is over the {self.ceiling / 1024 ** 2:.0f} MB ceiling, "
+              f"{current_rss() / 1024 ** 2:.0f} MB after trimming")
+
+    def report(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._snapshot = tracemalloc.take_snapshot()
+            print("tracemalloc started; ask for another report to see where memory goes from now on")
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        rss = current_rss()
+        traced, peak = tracemalloc.get_traced_memory()
+        print(f"Memory: {rss / 1024 ** 2 if rss else float('nan'):.0f} MB resident, "
+              f"{traced / 1024 ** 2:.1f} MB traced by Python (peak {peak / 1024 ** 2:.1f} MB)")
+        print("Largest allocation sites:")
+        for stat in snapshot.statistics("lineno")[:REPORT_LINES]:
+            print("  ", stat)
+        if self._snapshot is not None:
+            print("Growth since the previous report:")
+            for stat in snapshot.compare_to(self._snapshot, "lineno")[:REPORT_LINES]:
+                print("  ", stat)
+        self._snapshot = snapshot
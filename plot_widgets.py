@@ -1,2 +1,96 @@
-from matplotlib.backends.qt_compat import QtWidgets
+from matplotlib.backends.backend_qtagg import (
+    FigureCanvasQTAgg)
 
+from plotting import layout_key, new_figure, set_constrained_layout, update_spectrum_line
+from tracing import tracer
+
+
+class MplCanvas(FigureCanvasQTAgg):
+    """Ultimately, this is a QWidget (as well as a FigureCanvasAgg, etc.)."""
+
+    def __init__(self, parent, width=5, height=4, dpi=100):
+        self.fig, self.axes = new_figure(width, height, dpi)
+        self.line = None  # one Line2D per canvas, its data is replaced for every galaxy
+        self.spectrum = None
+        self._view = None
+        self.image = None  # one AxesImage, its data is replaced for every galaxy
+        self._layout = None  # layout_key of the last draw
+        super(MplCanvas, self).__init__(self.fig)
+        self.axes.callbacks.connect('xlim_changed', self._on_xlim_changed)
+        self.mpl_connect('scroll_event', self._on_scroll)
+
+    def draw(self):
+        # the actual rendering, run by Qt some time after draw_idle was requested
+        with tracer.span("canvas.draw"):
+            # the constrained layout is half the cost of a draw, but the axes only move when the
+            # canvas is resized or the tick labels change width, e.g. from 0.5 to -0.05
+            set_constrained_layout(self.fig, layout_key(self.fig, self.axes) != self._layout)
+            super(MplCanvas, self).draw()
+            self._layout = layout_key(self.fig, self.axes)
+
+    def _pixels(self):
+        return max(int(self.axes.bbox.width), 1)
+
+    def plot_spectrum(self, spectrum):
+        """Show a SpectrumPyramid at the resolution of the canvas."""
+        # the limits set by autoscaling to the whole spectrum need no second view from _on_xlim_changed
+        self.spectrum = None
+        # zooming with the wheel turns x autoscaling off; a new spectrum is shown whole again
+        self.axes.set_autoscalex_on(True)
+        freq, flux = spectrum.view(pixels=self._pixels())
+        self.line = update_spectrum_line(self.axes, self.line, freq, flux)
+        self.spectrum = spectrum
+        self._view = tuple(sorted(self.axes.get_xlim()))
+        # coalesces with the other canvases' repaints into the next event loop pass
+        self.draw_idle()
+
+    def clear_spectrum(self):
+        """Let go of the spectrum while the canvas is hidden; it is not redrawn until plotted again."""
+        self.spectrum = None
+        self._view = None
+        if self.line is not None:
+            self.line.set_data([], [])
+
+    def _on_xlim_changed(self, axes):
+        if self.spectrum is None or self.line is None:
+            return
+        x0, x1 = sorted(axes.get_xlim())
+        if self._view == (x0, x1):
+            return
+        self._view = (x0, x1)
+        # zoomed in far enough, the pyramid hands back the full resolution channels of the range
+        self.line.set_data(*self.spectrum.view(x0, x1, self._pixels()))
+        self.draw_idle()
+
+    def _on_scroll(self, event):
+        if event.inaxes is not self.axes or event.xdata is None:
+            return
+        scale = 0.8 if event.button == 'up' else 1.25
+        x0, x1 = self.axes.get_xlim()
+        self.axes.set_xlim(event.xdata - (event.xdata - x0) * scale, event.xdata + (x1 - event.xdata) * scale)
+
+    def plot_beams(self, spectrum):
+        self.plot_spectrum(spectrum)
+
+    def plot_synthesis(self, spectrum):
+        self.plot_spectrum(spectrum)
+
+    def plot_SDSS(self, image):
+        """Show a display-size cutout from sdss_images.ThumbnailCache."""
+        height, width = image.shape[:2]
+        extent = (-0.5, width - 0.5, height - 0.5, -0.5)
+        if self.image is None:
+            self.axes.set_axis_off()
+            self.image = self.axes.imshow(image, cmap="gray", extent=extent, interpolation="antialiased")
+        else:
+            self.image.set_data(image)
+            self.image.set_extent(extent)
+            self.image.set_visible(True)
+        self.axes.set_xlim(extent[0], extent[1])
+        self.axes.set_ylim(extent[2], extent[3])
+        self.draw_idle()
+
+    def clear_image(self):
+        if self.image is not None and self.image.get_visible():
+            self.image.set_visible(False)
+            self.draw_idle()
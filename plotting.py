@@ -0,0 +1,39 @@
+from matplotlib.figure import Figure
+
+# Qt-free drawing code shared by the inspector canvases and the headless thumbnail renderer
+
+
+def new_figure(width=5, height=4, dpi=100):
+    fig = Figure(figsize=(width, height), dpi=dpi, constrained_layout=True)
+    axes = fig.add_subplot(111)
+    return fig, axes
+
+
+def set_constrained_layout(fig, enabled):
+    """Switch the constrained layout of fig on or off; while off, the axes keep their last position."""
+    if hasattr(fig, "set_layout_engine"):  # matplotlib >= 3.6
+        fig.set_layout_engine("constrained" if enabled else "none")
+    else:
+        fig.set_constrained_layout(enabled)
+
+
+def layout_key(fig, axes):
+    """What the constrained layout of a single axes figure depends on: its size and the tick labels'."""
+    key = [fig.bbox.width, fig.bbox.height]
+    for axis in (axes.xaxis, axes.yaxis):
+        formatter = axis.get_major_formatter()
+        labels = formatter.format_ticks(axis.get_majorticklocs())
+        # character counts stand in for the label widths, which would take rendering the text
+        key += [max(map(len, labels), default=0), formatter.get_offset()]
+    return tuple(key)
+
+
+def update_spectrum_line(axes, line, freq, flux):
+    """Draw a spectrum into axes, reusing line (a Line2D from a previous call) when given."""
+    if line is None:
+        line, = axes.plot(freq, flux)
+    else:
+        line.set_data(freq, flux)
+        axes.relim()
+        axes.autoscale_view()
+    return line
@@ -0,0 +1,116 @@
+"""Render PNG previews of every galaxy's beams and synthesis spectrum without Qt.
+
+    python render_thumbnails.py --out thumbnails --workers 8
+
+Previews are written to <out>/<galaxy>/beam<N>.png and synthesis.png; a preview newer than its
+FITS file is left alone unless --force is given.
+"""
+import argparse
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from constants import DB_NAME, STATUS_RETIRED
+from decimate import minmax_decimate
+from plotting import new_figure, update_spectrum_line
+from spectra import BEAM_FLUX_COLUMN, SYNTHESIS_FLUX_COLUMN
+from spectrum_store import SpectrumStore, load_spectrum
+
+_store = None  # opened once per worker process
+
+
+def load_galaxies(db_name):
+    con = sqlite3.connect(db_name)
+    rows = con.execute(
+        """
+        SELECT g.galaxy_name, g.synthesis_file_path, b.path
+        FROM galaxies AS g
+        LEFT JOIN beams AS b ON b.galaxy_id = g.id
+        WHERE g.status != ?
+        ORDER BY g.id, b.beam_index
+        """,
+        (STATUS_RETIRED,)
+    )
+    galaxies = []
+    for name, synthesis, beam in rows:
+        if not galaxies or galaxies[-1]["galaxy_name"] != name:
+            galaxies.append({"galaxy_name": name, "beams": [], "synthesis": synthesis})
+        if beam:
+            galaxies[-1]["beams"].append(beam)
+    con.close()
+    return galaxies
+
+
+def thumbnail_jobs(galaxy, out_dir):
+    """(fits_path, flux_column, png_path) for every spectrum of the galaxy."""
+    galaxy_dir = os.path.join(out_dir, galaxy["galaxy_name"])
+    jobs = [(beam, BEAM_FLUX_COLUMN, os.path.join(galaxy_dir, f"beam{i + 1}.png"))
+            for i, beam in enumerate(galaxy["beams"])]
+    jobs.append((galaxy["synthesis"], SYNTHESIS_FLUX_COLUMN, os.path.join(galaxy_dir, "synthesis.png")))
+    return jobs
+
+
+def is_up_to_date(source, output):
+    try:
+        return os.stat(output).st_mtime_ns >= os.stat(source).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def render_galaxy(task):
+    global _store
+    if _store is None:
+        _store = SpectrumStore()
+    name, jobs, size, dpi = task
+    # one figure per galaxy, its line is reused for every spectrum like the inspector canvases do
+    fig, axes = new_figure(size[0], size[1], dpi)
+    line = None
+    try:
+        for source, flux_column, output in jobs:
+            freq, flux = load_spectrum(_store, source, flux_column)
+            freq, flux = minmax_decimate(freq, flux, int(size[0] * dpi))
+            line = update_spectrum_line(axes, line, freq, flux)
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            tmp = output + ".tmp"
+            fig.savefig(tmp, format="png")
+            os.replace(tmp, output)
+    except Exception as e:
+        return name, 0, f"{type(e).__name__}: {e}"
+    return name, len(jobs), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--out", default="thumbnails")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--width", type=float, default=5)
+    parser.add_argument("--height", type=float, default=4)
+    parser.add_argument("--dpi", type=int, default=60)
+    parser.add_argument("--force", action="store_true", help="re-render previews that are up to date")
+    args = parser.parse_args()
+
+    tasks = []
+    skipped = 0
+    for galaxy in load_galaxies(args.db):
+        jobs = [job for job in thumbnail_jobs(galaxy, args.out)
+                if args.force or not is_up_to_date(job[0], job[2])]
+        if jobs:
+            tasks.append((galaxy["galaxy_name"], jobs, (args.width, args.height), args.dpi))
+        else:
+            skipped += 1
+    print(f"{len(tasks)} galaxies to render, {skipped} up to date, {args.workers} workers")
+
+    start = time.perf_counter()
+    images = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for done, (name, rendered, error) in enumerate(executor.map(render_galaxy, tasks, chunksize=4), 1):
+            images += rendered
+            elapsed = time.perf_counter() - start
+            status = f"failed: {error}" if error else f"{rendered} images"
+            print(f"[{done}/{len(tasks)}] {name} {status} ({images / max(elapsed, 1e-9):.1f} images/s)", flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+from PyQt5.QtSql import QSqlDatabase, QSqlQuery
+
+from constants import BUSY_TIMEOUT_MS, DB_NAME, STATUS_DONE, STATUS_PENDING
+from tracing import tracer
+
+CONNECTION_NAME = "results_writer"
+WRITE_RETRIES = 5
+
+_STOP = object()
+
+
+def _exec(query, *values):
+    for value in values:
+        query.addBindValue(value)
+    if not query.exec():
+        print(__file__, "db error", query.lastError().text())
+        return False
+    return True
+
+
+class ResultsWriter:
+    """Persists inspection results on a background thread with group commits.
+
+    A commit happens once batch_size results are queued or max_latency seconds after the
+    first uncommitted result arrived, whichever comes first. Each result is written together
+    with marking its galaxy done, in the same transaction; undo takes both back.
+    """
+
+    def __init__(self, db_name=DB_NAME, batch_size=16, max_latency=0.5):
+        self.db_name = db_name
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.saved = 0
+        self.undone = 0
+        self.commits = 0
+        self.last_commit_latency = 0.0
+        self.max_commit_latency = 0.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="results-writer", daemon=True)
+        self._closed = False
+
+    def start(self):
+        self._thread.start()
+        # an exception escaping a Qt slot must not take queued results down with it
+        previous_hook = sys.excepthook
+
+        def excepthook(*exc_info):
+            self.flush(timeout=BUSY_TIMEOUT_MS / 1000)
+            previous_hook(*exc_info)
+            # PyQt only aborts on such an exception while no hook is installed; carrying on would
+            # leave the window half updated, e.g. naming one galaxy and showing the spectra of another
+            sys.stdout.flush()
+            sys.stderr.flush()
+            code = exc_info[1].code if isinstance(exc_info[1], SystemExit) else 1
+            os._exit(code if isinstance(code, int) else 1)
+
+        sys.excepthook = excepthook
+
+    def save(self, galaxy_id, galaxy_name, flags):
+        """Queue flags, as returned by MainWindow.getUserResults, for galaxy_id."""
+        self._queue.put(("save", galaxy_id, galaxy_name, flags))
+
+    def undo(self, galaxy_id, galaxy_name, inspector, lease_expires):
+        """Take back the last result saved for galaxy_id and hand the galaxy back to inspector."""
+        self._queue.put(("undo", galaxy_id, galaxy_name, inspector, lease_expires))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is committed."""
+        if self._closed or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        done.wait(timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "saved": self.saved,
+            "undone": self.undone,
+            "commits": self.commits,
+            "last_commit_latency_ms": self.last_commit_latency * 1000,
+            "max_commit_latency_ms": self.max_commit_latency * 1000,
+        }
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_latency
+        while len(batch) < self.batch_size and batch[-1] is not _STOP and batch[-1][0] != "flush":
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_batch(self, con, queries, undos, saves):
+        con.transaction()
+        # undos refer to results committed by earlier batches, so they go first
+        for _, galaxy_id, galaxy_name, inspector, lease_expires in undos:
+            if not (_exec(queries["delete"], galaxy_name)
+                    and _exec(queries["reopen"], STATUS_PENDING, inspector, lease_expires, galaxy_id, STATUS_DONE)):
+                con.rollback()
+                return False
+        for _, galaxy_id, galaxy_name, flags in saves:
+            if not (_exec(queries["insert"], galaxy_name, *(flag for pair in flags for flag in pair))
+                    and _exec(queries["done"], STATUS_DONE, galaxy_id)):
+                con.rollback()
+                return False
+        if not con.commit():
+            print(__file__, "commit failed", con.lastError().text())
+            con.rollback()
+            return False
+        return True
+
+    @staticmethod
+    def _split_batch(batch):
+        """The saves and undos of batch, with the saves taken back before they were written dropped."""
+        saves, undos = [], []
+        for op in batch:
+            if op is _STOP or op[0] == "flush":
+                continue
+            if op[0] == "save":
+                saves.append(op)
+                continue
+            pending = [i for i, save in enumerate(saves) if save[1] == op[1]]
+            if pending:
+                del saves[pending[-1]]
+            else:
+                undos.append(op)
+        return saves, undos
+
+    def _run(self):
+        # Qt connections may only be used from the thread that opened them
+        con = QSqlDatabase.addDatabase("QSQLITE", CONNECTION_NAME)
+        con.setDatabaseName(self.db_name)
+        con.setConnectOptions(f"QSQLITE_BUSY_TIMEOUT={BUSY_TIMEOUT_MS}")
+        if not con.open():
+            print(__file__, "db error", con.lastError().databaseText())
+            return
+
+        queries = {name: QSqlQuery(con) for name in ("insert", "done", "delete", "reopen")}
+        queries["insert"].prepare("""
+            INSERT INTO results (
+                galaxy_name,
+                beam1_rfi_flag,
+                beam1_ripple_flag,
+                beam2_rfi_flag,
+                beam2_ripple_flag,
+                beam3_rfi_flag,
+                beam3_ripple_flag,
+                beam4_rfi_flag,
+                beam4_ripple_flag,
+                synthesis_signal_flag,
+                synthesis_baseline_flag
+                )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """)
+        queries["done"].prepare("UPDATE galaxies SET status = ? WHERE id = ?")
+        queries["delete"].prepare("DELETE FROM results WHERE id = (SELECT MAX(id) FROM results WHERE galaxy_name = ?)")
+        queries["reopen"].prepare(
+            "UPDATE galaxies SET status = ?, claimed_by = ?, lease_expires = ? WHERE id = ? AND status = ?")
+
+        running = True
+        while running:
+            batch = self._next_batch()
+            saves, undos = self._split_batch(batch)
+            if saves or undos:
+                start = time.perf_counter_ns()
+                # other inspectors can hold the write lock for longer than the busy timeout
+                for attempt in range(WRITE_RETRIES):
+                    if self._write_batch(con, queries, undos, saves):
+                        break
+                    time.sleep(random.uniform(0, 0.1 * 2 ** attempt))
+                else:
+                    print(__file__, f"gave up writing {len(saves)} results and {len(undos)} undos")
+                end = time.perf_counter_ns()
+                self.last_commit_latency = (end - start) / 1e9
+                if tracer.enabled:
+                    tracer.record("db.commit", start, end, {"results": len(saves), "undos": len(undos)})
+                self.max_commit_latency = max(self.max_commit_latency, self.last_commit_latency)
+                self.saved += len(saves)
+                self.undone += len(undos)
+                self.commits += 1
+            for op in batch:
+                if op is _STOP:
+                    running = False
+                elif op[0] == "flush":
+                    op[1].set()
+
+        for query in queries.values():
+            query.finish()
+        con.close()
+        del queries, query, con
+        QSqlDatabase.removeDatabase(CONNECTION_NAME)
@@ -0,0 +1,144 @@
+import ast
+import os
+
+from PyQt5.QtSql import QSqlDatabase, QSqlQuery
+
+from constants import JOURNAL_MODE, STATUS_PENDING
+
+GALAXIES_TABLE = """
+    CREATE TABLE galaxies (
+        id INTEGER PRIMARY KEY AUTOINCREMENT UNIQUE,
+        galaxy_name TEXT NOT NULL,
+        synthesis_file_path TEXT NOT NULL,
+        sdss_file_path TEXT NOT NULL,
+        status INTEGER DEFAULT %d NOT NULL,
+        file_signature TEXT DEFAULT '' NOT NULL,
+        claimed_by TEXT DEFAULT '' NOT NULL,
+        lease_expires REAL DEFAULT 0 NOT NULL,
+        priority REAL DEFAULT 0 NOT NULL
+    )
+    """ % STATUS_PENDING
+
+BEAMS_TABLE = """
+    CREATE TABLE beams (
+        galaxy_id INTEGER NOT NULL REFERENCES galaxies (id),
+        beam_index INTEGER NOT NULL,
+        path TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime INTEGER NOT NULL,
+        PRIMARY KEY (galaxy_id, beam_index)
+    )
+    """
+
+RESULTS_TABLE = """
+    CREATE TABLE results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT UNIQUE,
+    galaxy_name TEXT NOT NULL,
+    beam1_rfi_flag INTEGER DEFAULT 0 NOT NULL ,
+    beam1_ripple_flag INTEGER DEFAULT 0 NOT NULL ,
+    beam2_rfi_flag INTEGER DEFAULT 0 NOT NULL,
+    beam2_ripple_flag INTEGER DEFAULT 0 NOT NULL,
+    beam3_rfi_flag INTEGER DEFAULT 0 NOT NULL,
+    beam3_ripple_flag INTEGER DEFAULT 0 NOT NULL,
+    beam4_rfi_flag INTEGER DEFAULT 0 NOT NULL,
+    beam4_ripple_flag INTEGER DEFAULT 0 NOT NULL,
+    synthesis_signal_flag INTEGER DEFAULT 0 NOT NULL,
+    synthesis_baseline_flag INTEGER DEFAULT 0 NOT NULL
+    )
+    """
+
+
+def table_columns(table):
+    query = QSqlQuery()
+    query.exec(f"PRAGMA table_info({table})")
+    columns = set()
+    while query.next():
+        columns.add(query.value(1))
+    return columns
+
+
+def create_tables():
+    query = QSqlQuery()
+    for statement in (GALAXIES_TABLE, BEAMS_TABLE, RESULTS_TABLE):
+        query.exec(statement)
+
+
+def create_indexes():
+    query = QSqlQuery()
+    # matches the claim order of GalaxyQueue; replaces the (status, id) index of older versions
+    query.exec("DROP INDEX IF EXISTS idx_galaxies_status_id")
+    query.exec("CREATE INDEX IF NOT EXISTS idx_galaxies_status_priority ON galaxies (status, priority DESC, id)")
+
+
+def _migrate_beam_file_path():
+    """Move the stringified beam lists of old databases into the beams table and drop the column."""
+    con = QSqlDatabase.database()
+    con.transaction()
+    query = QSqlQuery()
+    query.exec(BEAMS_TABLE)
+
+    galaxy_ids, beam_indexes, paths, sizes, mtimes = [], [], [], [], []
+    query.setForwardOnly(True)
+    query.exec("SELECT id, beam_file_path FROM galaxies")
+    while query.next():
+        galaxy_id = query.value(0)
+        for beam_index, path in enumerate(ast.literal_eval(query.value(1))):
+            try:
+                st = os.stat(path)
+                size, mtime = st.st_size, st.st_mtime_ns
+            except OSError:
+                size, mtime = 0, 0
+            galaxy_ids.append(galaxy_id)
+            beam_indexes.append(beam_index)
+            paths.append(path)
+            sizes.append(size)
+            mtimes.append(mtime)
+    query.finish()
+
+    insert_query = QSqlQuery()
+    insert_query.prepare("INSERT INTO beams (galaxy_id, beam_index, path, size, mtime) VALUES (?, ?, ?, ?, ?)")
+    for values in (galaxy_ids, beam_indexes, paths, sizes, mtimes):
+        insert_query.addBindValue(values)
+    ok = insert_query.execBatch()
+
+    # SQLite cannot drop a column in place on every version we ship with, so rebuild the table
+    rebuild = [
+        GALAXIES_TABLE.replace("galaxies", "galaxies_new", 1),
+        "INSERT INTO galaxies_new (id, galaxy_name, synthesis_file_path, sdss_file_path, status, file_signature) "
+        "SELECT id, galaxy_name, synthesis_file_path, sdss_file_path, status, file_signature FROM galaxies",
+        "DROP TABLE galaxies",
+        "ALTER TABLE galaxies_new RENAME TO galaxies",
+    ]
+    for statement in rebuild:
+        if not ok:
+            break
+        ok = query.exec(statement)
+    if not ok:
+        print(__file__, "beam migration failed:", query.lastError().text(), insert_query.lastError().text())
+        con.rollback()
+        return
+    con.commit()
+    print(f"Migrated {len(paths)} beam paths into the beams table")
+
+
+def migrate_database():
+    """Bring a galaxy.sqlite created by an older version of the inspector up to the current schema."""
+    query = QSqlQuery()
+    # lets the results writer commit while the window keeps reading
+    query.exec(f"PRAGMA journal_mode = {JOURNAL_MODE}")
+    columns = table_columns("galaxies")
+    if "status" not in columns:
+        query.exec(f"ALTER TABLE galaxies ADD COLUMN status INTEGER DEFAULT {STATUS_PENDING} NOT NULL")
+    if "file_signature" not in columns:
+        query.exec("ALTER TABLE galaxies ADD COLUMN file_signature TEXT DEFAULT '' NOT NULL")
+    if "beam_file_path" in columns:
+        _migrate_beam_file_path()
+    # the table rebuild above already creates these
+    columns = table_columns("galaxies")
+    if "claimed_by" not in columns:
+        query.exec("ALTER TABLE galaxies ADD COLUMN claimed_by TEXT DEFAULT '' NOT NULL")
+    if "lease_expires" not in columns:
+        query.exec("ALTER TABLE galaxies ADD COLUMN lease_expires REAL DEFAULT 0 NOT NULL")
+    if "priority" not in columns:
+        query.exec("ALTER TABLE galaxies ADD COLUMN priority REAL DEFAULT 0 NOT NULL")
+    create_indexes()
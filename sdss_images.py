@@ -0,0 +1,89 @@
+"""Display-size copies of the SDSS optical cutouts, cached on disk by content hash.
+
+A cutout is decoded once, reduced to at most DISPLAY_SIZE pixels on its longer side and saved
+as <cache>/<hash[:2]>/<hash>-<size>.npy, so later sessions, other inspectors sharing the data
+directory and renamed copies of the same image only pay for hashing the file.
+"""
+import hashlib
+import io
+import os
+import threading
+
+import numpy as np
+
+from constants import SDSS_THUMBNAIL_PATH
+
+DISPLAY_SIZE = 512
+FITS_STRETCH = 10.0  # asinh softening of FITS cutouts, which come as linear fluxes
+
+
+def _block_mean(image, size):
+    factor = -(-max(image.shape[:2]) // size)
+    if factor <= 1:
+        return image
+    h, w = image.shape[0] // factor * factor, image.shape[1] // factor * factor
+    return image[:h, :w].reshape(h // factor, factor, w // factor, factor, *image.shape[2:]).mean(axis=(1, 3))
+
+
+def decode_fits(data, size=DISPLAY_SIZE):
+    from astropy.io import fits
+    with fits.open(io.BytesIO(data)) as hdu:
+        image = next(h.data for h in hdu if h.data is not None and h.data.ndim >= 2)
+        image = np.asarray(image, dtype=np.float32)
+    while image.ndim > 2:  # data cubes: first plane
+        image = image[0]
+    image = _block_mean(np.nan_to_num(image), size)
+    lo, hi = np.percentile(image, (1, 99.5))
+    scaled = np.clip((image - lo) / max(hi - lo, 1e-12), 0, 1)
+    scaled = np.arcsinh(scaled * FITS_STRETCH) / np.arcsinh(FITS_STRETCH)
+    # FITS rows run bottom to top
+    return np.flipud((scaled * 255).astype(np.uint8))
+
+
+def decode_raster(data, size=DISPLAY_SIZE):
+    from PIL import Image
+    with Image.open(io.BytesIO(data)) as image:
+        # JPEGs are decoded straight at a reduced scale
+        image.draft("RGB", (size, size))
+        image = image.convert("RGB")
+        image.thumbnail((size, size))
+        return np.asarray(image)
+
+
+def decode_cutout(path, data, size=DISPLAY_SIZE):
+    if path.lower().endswith((".fits", ".fit")):
+        return decode_fits(data, size)
+    return decode_raster(data, size)
+
+
+class ThumbnailCache:
+    def __init__(self, cache_dir=SDSS_THUMBNAIL_PATH, size=DISPLAY_SIZE):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path):
+        """Return the display-size image of the cutout at path as a uint8 array."""
+        with open(path, 'rb') as fd:
+            data = fd.read()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        cached = os.path.join(self.cache_dir, digest[:2], f"{digest}-{self.size}.npy")
+        try:
+            image = np.load(cached)
+            self.hits += 1
+            return image
+        except (OSError, ValueError):
+            pass
+        self.misses += 1
+        image = decode_cutout(path, data, self.size)
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        # written under a unique name first, so a reader never sees half a file
+        tmp = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as fd:
+            np.save(fd, image)
+        os.replace(tmp, cached)
+        return image
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
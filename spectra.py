@@ -0,0 +1,158 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from tracing import tracer
+
+BEAM_FLUX_COLUMN = "TABL"
+SYNTHESIS_FLUX_COLUMN = "FLUXBL"
+
+
+def _native(column):
+    # FITS columns are big-endian; convert once so plotting and maths need no further copies
+    return np.ascontiguousarray(column, dtype=column.dtype.newbyteorder('='))
+
+
+def read_spectrum(file_path, flux_column):
+    # astropy takes longer to import than the rest of the inspector; the first read pays for it,
+    # normally on a prefetch thread
+    from astropy.io import fits
+    with fits.open(file_path) as hdu:
+        freq = _native(hdu[1].data['freq'])
+        flux = _native(hdu[1].data[flux_column])
+    return freq, flux
+
+
+class SpectrumCache:
+    """LRU cache of decoded spectra bounded by the bytes held, not by the number of entries.
+
+    Entries are keyed by (file_path, flux_column) and are only served while the file's
+    mtime and size are unchanged, so a rewritten FITS file is decoded again.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 ** 2, store=None):
+        self.max_bytes = max_bytes
+        self.store = store  # spectra packed in a SpectrumStore are served from its memory map
+        self.current_bytes = 0
+        self.store_hits = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, file_path, flux_column):
+        st = os.stat(file_path)
+        key = (file_path, flux_column)
+        signature = (st.st_mtime_ns, st.st_size)
+        if self.store is not None:
+            # memory-mapped views cost no heap, so they are not copied into the LRU
+            spectrum = self.store.get(file_path, flux_column, signature)
+            if spectrum is not None:
+                with self._lock:
+                    self.store_hits += 1
+                return spectrum
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+
+        with tracer.span("spectrum.decode", path=file_path):
+            freq, flux = read_spectrum(file_path, flux_column)
+        self._store(key, signature, freq, flux)
+        return freq, flux
+
+    def _store(self, key, signature, freq, flux):
+        size = freq.nbytes + flux.nbytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[3]
+            self._entries[key] = (signature, freq, flux, size)
+            self.current_bytes += size
+            self._evict(self.max_bytes)
+
+    def _evict(self, budget):
+        while self.current_bytes > budget and self._entries:
+            _, (_, _, _, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "store_hits": self.store_hits,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class SpectrumPrefetcher:
+    """Decodes the spectra of upcoming galaxies on a thread pool while the current one is inspected.
+
+    Works with any cache whose load(*key) does the decoding; keys are (file_path, flux_column)
+    for a SpectrumCache.
+    """
+
+    def __init__(self, cache, depth=3, max_workers=4, prepare=None, name="spectrum"):
+        self.cache = cache
+        self.depth = depth
+        self.prepare = prepare  # optional callable(freq, flux) run on the worker after loading
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-prefetch")
+        self._pending = {}
+        self._get_span = f"{name}.get"
+
+    def prefetch(self, spectra):
+        """Schedule keys; anything else still queued is dropped."""
+        wanted = set(spectra)
+        for key, future in list(self._pending.items()):
+            if key not in wanted:
+                future.cancel()
+                del self._pending[key]
+        for key in spectra:
+            if key not in self._pending:
+                self._pending[key] = self._executor.submit(self._load, *key)
+
+    def _load(self, *key):
+        spectrum = self.cache.load(*key)
+        if self.prepare is not None:
+            spectrum = self.prepare(*spectrum)
+        return spectrum
+
+    def get(self, *key):
+        future = self._pending.pop(key, None)
+        with tracer.span(self._get_span, path=key[0], prefetched=future is not None):
+            if future is None or future.cancelled():
+                return self._load(*key)
+            return future.result()
+
+    def get_nowait(self, *key):
+        """Return the loaded item if it is ready, None while it is still loading; starts loading it if needed."""
+        future = self._pending.get(key)
+        if future is None or future.cancelled():
+            future = self._pending[key] = self._executor.submit(self._load, *key)
+        if not future.done():
+            return None
+        del self._pending[key]
+        return future.result()
+
+    def shutdown(self):
+        self._pending.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
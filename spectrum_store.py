@@ -0,0 +1,145 @@
+"""Columnar store of decoded spectra, read zero-copy through np.memmap.
+
+    python spectrum_store.py [--rebuild]
+
+packs the freq column and the TABL/FLUXBL column of every beam and synthesis file listed in
+galaxy.sqlite into one float64 file (<store>.bin). A JSON index (<store>.json) maps each
+(file, column) to its offset, channel count and the FITS file's size and mtime; a spectrum whose
+FITS file changed after packing is not served and falls back to FITS until the store is rebuilt.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from constants import DB_NAME, SPECTRUM_STORE_PATH, STATUS_RETIRED
+from spectra import BEAM_FLUX_COLUMN, SYNTHESIS_FLUX_COLUMN, read_spectrum
+
+DTYPE = np.float64
+
+
+def _key(file_path, flux_column):
+    return f"{flux_column}:{file_path}"
+
+
+class SpectrumStore:
+    def __init__(self, path=SPECTRUM_STORE_PATH):
+        self.data_path = path + ".bin"
+        self.index_path = path + ".json"
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as fd:
+                self.index = json.load(fd)
+        self._data = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.index)
+
+    def _array(self, end):
+        with self._lock:
+            if self._data is None or len(self._data) < end:
+                self._data = np.memmap(self.data_path, dtype=DTYPE, mode='r')
+            return self._data
+
+    def get(self, file_path, flux_column, signature):
+        """Return (freq, flux) views into the store, or None if the spectrum is not packed or stale.
+
+        signature is the (mtime_ns, size) of the FITS file as stat'ed by the caller.
+        """
+        entry = self.index.get(_key(file_path, flux_column))
+        if entry is None:
+            return None
+        offset, channels, size, mtime = entry
+        if (mtime, size) != signature:
+            return None
+        data = self._array(offset + 2 * channels)
+        return data[offset:offset + channels], data[offset + channels:offset + 2 * channels]
+
+
+def load_spectrum(store, file_path, flux_column):
+    """Read a spectrum from the store when it is packed and current, otherwise from FITS."""
+    st = os.stat(file_path)
+    spectrum = store.get(file_path, flux_column, (st.st_mtime_ns, st.st_size))
+    if spectrum is None:
+        spectrum = read_spectrum(file_path, flux_column)
+    return spectrum
+
+
+def spectrum_files(db_name):
+    con = sqlite3.connect(db_name)
+    files = [(path, BEAM_FLUX_COLUMN) for path, in con.execute(
+        "SELECT b.path FROM beams AS b JOIN galaxies AS g ON g.id = b.galaxy_id WHERE g.status != ?",
+        (STATUS_RETIRED,))]
+    files += [(path, SYNTHESIS_FLUX_COLUMN) for path, in con.execute(
+        "SELECT synthesis_file_path FROM galaxies WHERE status != ?", (STATUS_RETIRED,))]
+    con.close()
+    return files
+
+
+def _read(job):
+    file_path, flux_column, _, _ = job
+    try:
+        return read_spectrum(file_path, flux_column)
+    except Exception as e:
+        print(f"Skipping {file_path}: {type(e).__name__}: {e}")
+        return None
+
+
+def build_store(db_name=DB_NAME, path=SPECTRUM_STORE_PATH, rebuild=False, workers=4):
+    start = time.perf_counter()
+    store = SpectrumStore(path)
+    index = {} if rebuild else store.index
+
+    jobs = []
+    for file_path, flux_column in spectrum_files(db_name):
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
+            continue
+        entry = index.get(_key(file_path, flux_column))
+        if entry is None or entry[2:] != [st.st_size, st.st_mtime_ns]:
+            jobs.append((file_path, flux_column, st.st_size, st.st_mtime_ns))
+
+    # stale entries are appended again rather than rewritten in place; --rebuild compacts the file.
+    # Inspectors and features.py workers may have the live file mapped, so a rebuild is written next
+    # to it and swapped in whole: an open mapping keeps reading the old file with the old index.
+    data_path = store.data_path + ".tmp" if rebuild else store.data_path
+    with open(data_path, 'wb' if rebuild else 'ab') as fd, ThreadPoolExecutor(workers) as executor:
+        offset = fd.tell() // np.dtype(DTYPE).itemsize
+        for job, spectrum in zip(jobs, executor.map(_read, jobs)):
+            if spectrum is None:
+                continue
+            freq, flux = spectrum
+            block = np.concatenate([freq.astype(DTYPE), flux.astype(DTYPE)])
+            fd.write(block.tobytes())
+            file_path, flux_column, size, mtime = job
+            index[_key(file_path, flux_column)] = [offset, len(freq), size, mtime]
+            offset += len(block)
+
+    if rebuild:
+        os.replace(data_path, store.data_path)
+    tmp = store.index_path + ".tmp"
+    with open(tmp, 'w') as fd:
+        json.dump(index, fd)
+    os.replace(tmp, store.index_path)
+    print(f"Packed {len(jobs)} spectra ({len(index)} in store) in {time.perf_counter() - start:.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--store", default=SPECTRUM_STORE_PATH)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rebuild", action="store_true", help="repack everything and drop stale data")
+    args = parser.parse_args()
+    build_store(args.db, args.store, args.rebuild, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import builtins
+import sys
+import threading
+import time
+
+
+class StartupProfiler:
+    """Times first-time imports per top-level package and named startup stages.
+
+    Imports are attributed to the package named in the outermost import statement that
+    triggered them, so "matplotlib" includes numpy if matplotlib was what pulled numpy in.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.imports = {}
+        self.stages = []
+        self._local = threading.local()  # prefetch threads import concurrently with the GUI thread
+        self._lock = threading.Lock()
+        self._in_progress = set()
+        self._original_import = builtins.__import__
+
+    def install(self):
+        builtins.__import__ = self._import
+
+    def _import(self, name, *args, **kwargs):
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        top = name.partition('.')[0]
+        with self._lock:
+            # a thread waiting for another thread's import of the same package is not counted again
+            timed = not depth and name not in sys.modules and top not in self._in_progress
+            if timed:
+                self._in_progress.add(top)
+        if not timed:
+            try:
+                return self._original_import(name, *args, **kwargs)
+            finally:
+                self._local.depth = depth
+        begin = time.perf_counter()
+        try:
+            return self._original_import(name, *args, **kwargs)
+        finally:
+            self._local.depth = depth
+            with self._lock:
+                self._in_progress.discard(top)
+                self.imports[top] = self.imports.get(top, 0.0) + time.perf_counter() - begin
+
+    def stage(self, name):
+        """Mark the end of a startup stage."""
+        self.stages.append((name, time.perf_counter()))
+
+    def report(self):
+        builtins.__import__ = self._original_import
+        print("Startup profile")
+        print("-" * 40)
+        previous = self.start
+        for name, at in self.stages:
+            print(f"{name:<28}{(at - previous) * 1000:9.1f} ms")
+            previous = at
+        print(f"{'total':<28}{(previous - self.start) * 1000:9.1f} ms")
+        print("-" * 40)
+        print("Imports (including their dependencies)")
+        for name, seconds in sorted(self.imports.items(), key=lambda item: -item[1]):
+            if seconds >= 0.001:
+                print(f"{name:<28}{seconds * 1000:9.1f} ms")
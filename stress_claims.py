@@ -0,0 +1,159 @@
+"""Stress test of galaxy claiming with several inspector processes sharing one database.
+
+    python stress_claims.py --inspectors 8 --galaxies 2000 --crash
+
+Each process claims galaxies through GalaxyQueue and saves a result for every one of them through
+ResultsWriter, like the inspector does, only without the window. With --crash one of them dies
+midway without releasing its claims; the others pick those galaxies up once the leases expire.
+At the end every galaxy must be done with exactly one result, and no galaxy may have been handed
+to two live inspectors.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from constants import BUSY_TIMEOUT_MS, JOURNAL_MODE, STATUS_DONE, STATUS_PENDING
+
+NO_FLAGS = ((0, 0),) * 5
+
+
+def create_database(db_name, galaxies):
+    from schema import BEAMS_TABLE, GALAXIES_TABLE, RESULTS_TABLE
+    con = sqlite3.connect(db_name)
+    con.execute(f"PRAGMA journal_mode = {JOURNAL_MODE}")
+    for statement in (GALAXIES_TABLE, BEAMS_TABLE, RESULTS_TABLE):
+        con.execute(statement)
+    con.execute("CREATE INDEX IF NOT EXISTS idx_galaxies_status_priority ON galaxies (status, priority DESC, id)")
+    con.executemany("INSERT INTO galaxies (galaxy_name, synthesis_file_path, sdss_file_path) VALUES (?, ?, '')",
+                    ((f"AGC{g}", f"data/synthesis/AGC{g}.fits") for g in range(galaxies)))
+    con.commit()
+    con.close()
+
+
+def pending_galaxies():
+    from PyQt5.QtSql import QSqlQuery
+    query = QSqlQuery()
+    query.prepare("SELECT COUNT(*) FROM galaxies WHERE status = ?")
+    query.addBindValue(STATUS_PENDING)
+    query.exec()
+    query.next()
+    return query.value(0)
+
+
+def inspector(db_name, number, args, results):
+    from PyQt5.QtCore import QCoreApplication
+    from PyQt5.QtSql import QSqlDatabase
+
+    from galaxy_queue import GalaxyQueue
+    from results_writer import ResultsWriter
+
+    app = QCoreApplication(sys.argv[:1])
+    con = QSqlDatabase.addDatabase("QSQLITE")
+    con.setDatabaseName(db_name)
+    con.setConnectOptions(f"QSQLITE_BUSY_TIMEOUT={BUSY_TIMEOUT_MS}")
+    con.open()
+    queue = GalaxyQueue(lease_seconds=args.lease_seconds)
+    writer = ResultsWriter(db_name, max_latency=0.05)
+    writer.start()
+    crash_after = args.galaxies // args.inspectors // 2 if args.crash and number == 0 else None
+
+    seen = []
+    pop_ms = []
+    while True:
+        start = time.perf_counter()
+        galaxy = queue.pop()
+        pop_ms.append((time.perf_counter() - start) * 1000)
+        if galaxy is None:
+            # galaxies still claimed by others come back if their inspector is gone
+            writer.flush()
+            if not pending_galaxies():
+                break
+            time.sleep(args.lease_seconds / 4)
+            continue
+        seen.append(galaxy["id"])
+        if crash_after is not None and len(seen) == crash_after:
+            # no release, no flush: the claims and the queued results are lost with the process
+            os._exit(1)
+        time.sleep(random.uniform(0, args.think_ms / 1000))
+        writer.save(galaxy["id"], galaxy["galaxy_name"], NO_FLAGS)
+
+    writer.close()
+    queue.release()
+    results.put((number, seen, pop_ms))
+    del app
+
+
+def check(db_name, galaxies):
+    con = sqlite3.connect(db_name)
+    problems = []
+    not_done = con.execute("SELECT COUNT(*) FROM galaxies WHERE status != ?", (STATUS_DONE,)).fetchone()[0]
+    if not_done:
+        problems.append(f"{not_done} galaxies are not done")
+    results = con.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+    if results != galaxies:
+        problems.append(f"{results} results for {galaxies} galaxies")
+    duplicates = con.execute(
+        "SELECT COUNT(*) FROM (SELECT galaxy_name FROM results GROUP BY galaxy_name HAVING COUNT(*) > 1)").fetchone()[0]
+    if duplicates:
+        problems.append(f"{duplicates} galaxies have more than one result")
+    con.close()
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--inspectors", type=int, default=8)
+    parser.add_argument("--galaxies", type=int, default=2000)
+    parser.add_argument("--think-ms", type=float, default=2.0, help="longest pause between two galaxies")
+    parser.add_argument("--lease-seconds", type=float, default=2.0)
+    parser.add_argument("--crash", action="store_true", help="let one inspector die holding claims")
+    parser.add_argument("--db", help="database to create (default: in a temporary directory)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="galaxy-claims-")
+    db_name = args.db or os.path.join(workdir, "galaxy.sqlite")
+    create_database(db_name, args.galaxies)
+
+    # Qt must not be forked into the children
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [context.Process(target=inspector, args=(db_name, number, args, results))
+                 for number in range(args.inspectors)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    finished = [results.get() for _ in range(args.inspectors - (1 if args.crash else 0))]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    handed_out = [galaxy_id for _, seen, _ in finished for galaxy_id in seen]
+    pop_ms = np.array([ms for _, _, pop in finished for ms in pop])
+    print(f"{args.inspectors} inspectors, {args.galaxies} galaxies in {elapsed:.2f} s "
+          f"({args.galaxies / elapsed:.0f} galaxies/s)")
+    for number, seen, _ in sorted(finished):
+        print(f"  inspector {number}: {len(seen)} galaxies")
+    print(f"pop latency p50 {np.percentile(pop_ms, 50):.2f} ms, p99 {np.percentile(pop_ms, 99):.2f} ms, "
+          f"max {pop_ms.max():.2f} ms")
+
+    problems = check(db_name, args.galaxies)
+    shutil.rmtree(workdir, ignore_errors=True)
+    if len(handed_out) != len(set(handed_out)):
+        problems.append(f"{len(handed_out) - len(set(handed_out))} galaxies were handed to two live inspectors")
+    for problem in problems:
+        print("FAIL:", problem)
+    if not problems:
+        print("OK: every galaxy was inspected exactly once")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
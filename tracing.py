@@ -0,0 +1,109 @@
+"""Span timing for the inspector's hot path.
+
+    with tracer.span("db.next", galaxy=name):
+        ...
+
+Spans are only recorded while tracer.enabled is set (main.py --trace-json PATH or --trace-chrome
+PATH); otherwise span() returns a shared no-op context manager. Finished spans go into a
+fixed-size ring buffer and can be summarised as percentiles or exported as JSON or as a Chrome
+trace (chrome://tracing, Perfetto).
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+RING_BUFFER_SIZE = 50000
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.record(self.name, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+
+class Tracer:
+    def __init__(self, capacity=RING_BUFFER_SIZE):
+        self.enabled = False
+        self._spans = deque(maxlen=capacity)
+        self._origin = time.perf_counter_ns()
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def record(self, name, start_ns, end_ns, args=None):
+        # deque.append is atomic, so prefetch and writer threads need no lock here
+        self._spans.append((name, start_ns, end_ns, threading.get_ident(), args or {}))
+
+    def clear(self):
+        self._spans.clear()
+
+    def spans(self):
+        return list(self._spans)
+
+    def summary(self):
+        """{name: {"count", "p50_ms", "p95_ms", "p99_ms", "max_ms"}} over the spans in the buffer."""
+        durations = {}
+        for name, start, end, _, _ in self.spans():
+            durations.setdefault(name, []).append((end - start) / 1e6)
+        summary = {}
+        for name, values in durations.items():
+            values.sort()
+            last = len(values) - 1
+            summary[name] = {
+                "count": len(values),
+                "p50_ms": values[round(0.50 * last)],
+                "p95_ms": values[round(0.95 * last)],
+                "p99_ms": values[round(0.99 * last)],
+                "max_ms": values[-1],
+            }
+        return summary
+
+    def print_summary(self):
+        print(f"{'span':<22}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for name, stats in sorted(self.summary().items()):
+            print(f"{name:<22}{stats['count']:>8}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+                  f"{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+
+    def export_json(self, path):
+        spans = [{"name": name, "start_ms": (start - self._origin) / 1e6, "duration_ms": (end - start) / 1e6,
+                  "thread": thread, "args": args}
+                 for name, start, end, thread, args in self.spans()]
+        with open(path, 'w') as fd:
+            json.dump({"summary": self.summary(), "spans": spans}, fd, indent=1, default=str)
+
+    def export_chrome_trace(self, path):
+        pid = os.getpid()
+        events = [{"name": name, "ph": "X", "ts": (start - self._origin) / 1e3, "dur": (end - start) / 1e3,
+                   "pid": pid, "tid": thread, "args": args}
+                  for name, start, end, thread, args in self.spans()]
+        with open(path, 'w') as fd:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fd, default=str)
+
+
+tracer = Tracer()
@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'mainwindow.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_MainWindow(object):
+    def setupUi(self, MainWindow):
+        MainWindow.setObjectName("MainWindow")
+        MainWindow.resize(1250, 900)
+        MainWindow.setStyleSheet("")
+        self.centralwidget = QtWidgets.QWidget(MainWindow)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.centralwidget.sizePolicy().hasHeightForWidth())
+        self.centralwidget.setSizePolicy(sizePolicy)
+        self.centralwidget.setObjectName("centralwidget")
+        self.verticalLayout_6 = QtWidgets.QVBoxLayout(self.centralwidget)
+        self.verticalLayout_6.setObjectName("verticalLayout_6")
+        self.label_galaxy_name = QtWidgets.QLabel(self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.label_galaxy_name.sizePolicy().hasHeightForWidth())
+        self.label_galaxy_name.setSizePolicy(sizePolicy)
+        font = QtGui.QFont()
+        font.setFamily("Consolas")
+        font.setPointSize(16)
+        font.setBold(True)
+        font.setWeight(75)
+        self.label_galaxy_name.setFont(font)
+        self.label_galaxy_name.setAlignment(QtCore.Qt.AlignCenter)
+        self.label_galaxy_name.setObjectName("label_galaxy_name")
+        self.verticalLayout_6.addWidget(self.label_galaxy_name)
+        self.widget_9 = QtWidgets.QWidget(self.centralwidget)
+        self.widget_9.setObjectName("widget_9")
+        self.horizontalLayout_9 = QtWidgets.QHBoxLayout(self.widget_9)
+        self.horizontalLayout_9.setObjectName("horizontalLayout_9")
+        self.gb_beam1 = QtWidgets.QGroupBox(self.widget_9)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.gb_beam1.sizePolicy().hasHeightForWidth())
+        self.gb_beam1.setSizePolicy(sizePolicy)
+        self.gb_beam1.setObjectName("gb_beam1")
+        self.verticalLayout = QtWidgets.QVBoxLayout(self.gb_beam1)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.widget_beam1 = QtWidgets.QWidget(self.gb_beam1)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.widget_beam1.sizePolicy().hasHeightForWidth())
+        self.widget_beam1.setSizePolicy(sizePolicy)
+        self.widget_beam1.setMinimumSize(QtCore.QSize(250, 250))
+        self.widget_beam1.setMaximumSize(QtCore.QSize(250, 250))
+        self.widget_beam1.setStyleSheet("")
+        self.widget_beam1.setObjectName("widget_beam1")
+        self.verticalLayout.addWidget(self.widget_beam1)
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.label = QtWidgets.QLabel(self.gb_beam1)
+        self.label.setObjectName("label")
+        self.horizontalLayout.addWidget(self.label)
+        self.rb_beam1_rfi_1 = QtWidgets.QRadioButton(self.gb_beam1)
+        self.rb_beam1_rfi_1.setObjectName("rb_beam1_rfi_1")
+        self.horizontalLayout.addWidget(self.rb_beam1_rfi_1)
+        self.rb_beam1_rfi_2 = QtWidgets.QRadioButton(self.gb_beam1)
+        self.rb_beam1_rfi_2.setObjectName("rb_beam1_rfi_2")
+        self.horizontalLayout.addWidget(self.rb_beam1_rfi_2)
+        self.rb_beam1_rfi_3 = QtWidgets.QRadioButton(self.gb_beam1)
+        self.rb_beam1_rfi_3.setObjectName("rb_beam1_rfi_3")
+        self.horizontalLayout.addWidget(self.rb_beam1_rfi_3)
+        self.verticalLayout.addLayout(self.horizontalLayout)
+        self.horizontalLayout_2 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_2.setObjectName("horizontalLayout_2")
+        self.label_2 = QtWidgets.QLabel(self.gb_beam1)
+        self.label_2.setObjectName("label_2")
+        self.horizontalLayout_2.addWidget(self.label_2)
+        self.rb_beam1_ripple_1 = QtWidgets.QRadioButton(self.gb_beam1)
+        self.rb_beam1_ripple_1.setObjectName("rb_beam1_ripple_1")
+        self.horizontalLayout_2.addWidget(self.rb_beam1_ripple_1)
+        self.rb_beam1_ripple_2 = QtWidgets.QRadioButton(self.gb_beam1)
+        self.rb_beam1_ripple_2.setObjectName("rb_beam1_ripple_2")
+        self.horizontalLayout_2.addWidget(self.rb_beam1_ripple_2)
+        self.verticalLayout.addLayout(self.horizontalLayout_2)
+        self.horizontalLayout_9.addWidget(self.gb_beam1)
+        self.gb_beam2 = QtWidgets.QGroupBox(self.widget_9)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.gb_beam2.sizePolicy().hasHeightForWidth())
+        self.gb_beam2.setSizePolicy(sizePolicy)
+        self.gb_beam2.setObjectName("gb_beam2")
+        self.verticalLayout_2 = QtWidgets.QVBoxLayout(self.gb_beam2)
+        self.verticalLayout_2.setObjectName("verticalLayout_2")
+        self.widget_beam2 = QtWidgets.QWidget(self.gb_beam2)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.widget_beam2.sizePolicy().hasHeightForWidth())
+        self.widget_beam2.setSizePolicy(sizePolicy)
+        self.widget_beam2.setMinimumSize(QtCore.QSize(250, 250))
+        self.widget_beam2.setMaximumSize(QtCore.QSize(250, 250))
+        self.widget_beam2.setStyleSheet("")
+        self.widget_beam2.setObjectName("widget_beam2")
+        self.verticalLayout_2.addWidget(self.widget_beam2)
+        self.horizontalLayout_3 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_3.setObjectName("horizontalLayout_3")
+        self.label_3 = QtWidgets.QLabel(self.gb_beam2)
+        self.label_3.setObjectName("label_3")
+        self.horizontalLayout_3.addWidget(self.label_3)
+        self.rb_beam2_rfi_1 = QtWidgets.QRadioButton(self.gb_beam2)
+        self.rb_beam2_rfi_1.setObjectName("rb_beam2_rfi_1")
+        self.horizontalLayout_3.addWidget(self.rb_beam2_rfi_1)
+        self.rb_beam2_rfi_2 = QtWidgets.QRadioButton(self.gb_beam2)
+        self.rb_beam2_rfi_2.setObjectName("rb_beam2_rfi_2")
+        self.horizontalLayout_3.addWidget(self.rb_beam2_rfi_2)
+        self.rb_beam2_rfi_3 = QtWidgets.QRadioButton(self.gb_beam2)
+        self.rb_beam2_rfi_3.setObjectName("rb_beam2_rfi_3")
+        self.horizontalLayout_3.addWidget(self.rb_beam2_rfi_3)
+        self.verticalLayout_2.addLayout(self.horizontalLayout_3)
+        self.horizontalLayout_4 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_4.setObjectName("horizontalLayout_4")
+        self.label_4 = QtWidgets.QLabel(self.gb_beam2)
+        self.label_4.setObjectName("label_4")
+        self.horizontalLayout_4.addWidget(self.label_4)
+        self.rb_beam2_ripple_1 = QtWidgets.QRadioButton(self.gb_beam2)
+        self.rb_beam2_ripple_1.setObjectName("rb_beam2_ripple_1")
+        self.horizontalLayout_4.addWidget(self.rb_beam2_ripple_1)
+        self.rb_beam2_ripple_2 = QtWidgets.QRadioButton(self.gb_beam2)
+        self.rb_beam2_ripple_2.setObjectName("rb_beam2_ripple_2")
+        self.horizontalLayout_4.addWidget(self.rb_beam2_ripple_2)
+        self.verticalLayout_2.addLayout(self.horizontalLayout_4)
+        self.horizontalLayout_9.addWidget(self.gb_beam2)
+        self.gb_beam3 = QtWidgets.QGroupBox(self.widget_9)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.gb_beam3.sizePolicy().hasHeightForWidth())
+        self.gb_beam3.setSizePolicy(sizePolicy)
+        self.gb_beam3.setObjectName("gb_beam3")
+        self.verticalLayout_3 = QtWidgets.QVBoxLayout(self.gb_beam3)
+        self.verticalLayout_3.setObjectName("verticalLayout_3")
+        self.widget_beam3 = QtWidgets.QWidget(self.gb_beam3)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.widget_beam3.sizePolicy().hasHeightForWidth())
+        self.widget_beam3.setSizePolicy(sizePolicy)
+        self.widget_beam3.setMinimumSize(QtCore.QSize(250, 250))
+        self.widget_beam3.setMaximumSize(QtCore.QSize(250, 250))
+        self.widget_beam3.setStyleSheet("")
+        self.widget_beam3.setObjectName("widget_beam3")
+        self.verticalLayout_3.addWidget(self.widget_beam3)
+        self.horizontalLayout_5 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_5.setObjectName("horizontalLayout_5")
+        self.label_5 = QtWidgets.QLabel(self.gb_beam3)
+        self.label_5.setObjectName("label_5")
+        self.horizontalLayout_5.addWidget(self.label_5)
+        self.rb_beam3_rfi_1 = QtWidgets.QRadioButton(self.gb_beam3)
+        self.rb_beam3_rfi_1.setObjectName("rb_beam3_rfi_1")
+        self.horizontalLayout_5.addWidget(self.rb_beam3_rfi_1)
+        self.rb_beam3_rfi_2 = QtWidgets.QRadioButton(self.gb_beam3)
+        self.rb_beam3_rfi_2.setObjectName("rb_beam3_rfi_2")
+        self.horizontalLayout_5.addWidget(self.rb_beam3_rfi_2)
+        self.rb_beam3_rfi_3 = QtWidgets.QRadioButton(self.gb_beam3)
+        self.rb_beam3_rfi_3.setObjectName("rb_beam3_rfi_3")
+        self.horizontalLayout_5.addWidget(self.rb_beam3_rfi_3)
+        self.verticalLayout_3.addLayout(self.horizontalLayout_5)
+        self.horizontalLayout_6 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_6.setObjectName("horizontalLayout_6")
+        self.label_6 = QtWidgets.QLabel(self.gb_beam3)
+        self.label_6.setObjectName("label_6")
+        self.horizontalLayout_6.addWidget(self.label_6)
+        self.rb_beam3_ripple_1 = QtWidgets.QRadioButton(self.gb_beam3)
+        self.rb_beam3_ripple_1.setObjectName("rb_beam3_ripple_1")
+        self.horizontalLayout_6.addWidget(self.rb_beam3_ripple_1)
+        self.rb_beam3_ripple_2 = QtWidgets.QRadioButton(self.gb_beam3)
+        self.rb_beam3_ripple_2.setObjectName("rb_beam3_ripple_2")
+        self.horizontalLayout_6.addWidget(self.rb_beam3_ripple_2)
+        self.verticalLayout_3.addLayout(self.horizontalLayout_6)
+        self.horizontalLayout_9.addWidget(self.gb_beam3)
+        self.gb_beam4 = QtWidgets.QGroupBox(self.widget_9)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.gb_beam4.sizePolicy().hasHeightForWidth())
+        self.gb_beam4.setSizePolicy(sizePolicy)
+        self.gb_beam4.setObjectName("gb_beam4")
+        self.verticalLayout_4 = QtWidgets.QVBoxLayout(self.gb_beam4)
+        self.verticalLayout_4.setObjectName("verticalLayout_4")
+        self.widget_beam4 = QtWidgets.QWidget(self.gb_beam4)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.widget_beam4.sizePolicy().hasHeightForWidth())
+        self.widget_beam4.setSizePolicy(sizePolicy)
+        self.widget_beam4.setMinimumSize(QtCore.QSize(250, 250))
+        self.widget_beam4.setMaximumSize(QtCore.QSize(250, 250))
+        self.widget_beam4.setStyleSheet("")
+        self.widget_beam4.setObjectName("widget_beam4")
+        self.verticalLayout_4.addWidget(self.widget_beam4)
+        self.horizontalLayout_7 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_7.setObjectName("horizontalLayout_7")
+        self.label_7 = QtWidgets.QLabel(self.gb_beam4)
+        self.label_7.setObjectName("label_7")
+        self.horizontalLayout_7.addWidget(self.label_7)
+        self.rb_beam4_rfi_1 = QtWidgets.QRadioButton(self.gb_beam4)
+        self.rb_beam4_rfi_1.setObjectName("rb_beam4_rfi_1")
+        self.horizontalLayout_7.addWidget(self.rb_beam4_rfi_1)
+        self.rb_beam4_rfi_2 = QtWidgets.QRadioButton(self.gb_beam4)
+        self.rb_beam4_rfi_2.setObjectName("rb_beam4_rfi_2")
+        self.horizontalLayout_7.addWidget(self.rb_beam4_rfi_2)
+        self.rb_beam4_rfi_3 = QtWidgets.QRadioButton(self.gb_beam4)
+        self.rb_beam4_rfi_3.setObjectName("rb_beam4_rfi_3")
+        self.horizontalLayout_7.addWidget(self.rb_beam4_rfi_3)
+        self.verticalLayout_4.addLayout(self.horizontalLayout_7)
+        self.horizontalLayout_8 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_8.setObjectName("horizontalLayout_8")
+        self.label_8 = QtWidgets.QLabel(self.gb_beam4)
+        self.label_8.setObjectName("label_8")
+        self.horizontalLayout_8.addWidget(self.label_8)
+        self.rb_beam4_ripple_1 = QtWidgets.QRadioButton(self.gb_beam4)
+        self.rb_beam4_ripple_1.setObjectName("rb_beam4_ripple_1")
+        self.horizontalLayout_8.addWidget(self.rb_beam4_ripple_1)
+        self.rb_beam4_ripple_2 = QtWidgets.QRadioButton(self.gb_beam4)
+        self.rb_beam4_ripple_2.setObjectName("rb_beam4_ripple_2")
+        self.horizontalLayout_8.addWidget(self.rb_beam4_ripple_2)
+        self.verticalLayout_4.addLayout(self.horizontalLayout_8)
+        self.horizontalLayout_9.addWidget(self.gb_beam4)
+        self.verticalLayout_6.addWidget(self.widget_9)
+        self.widget_7 = QtWidgets.QWidget(self.centralwidget)
+        self.widget_7.setObjectName("widget_7")
+        self.widget_SDSS = QtWidgets.QWidget(self.widget_7)
+        self.widget_SDSS.setGeometry(QtCore.QRect(660, 30, 300, 300))
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.widget_SDSS.sizePolicy().hasHeightForWidth())
+        self.widget_SDSS.setSizePolicy(sizePolicy)
+        self.widget_SDSS.setMinimumSize(QtCore.QSize(300, 300))
+        self.widget_SDSS.setMaximumSize(QtCore.QSize(300, 300))
+        self.widget_SDSS.setStyleSheet("")
+        self.widget_SDSS.setObjectName("widget_SDSS")
+        self.label_11 = QtWidgets.QLabel(self.widget_SDSS)
+        self.label_11.setGeometry(QtCore.QRect(120, 20, 60, 16))
+        self.label_11.setScaledContents(False)
+        self.label_11.setAlignment(QtCore.Qt.AlignCenter)
+        self.label_11.setObjectName("label_11")
+        self.btn_next = QtWidgets.QPushButton(self.widget_7)
+        self.btn_next.setGeometry(QtCore.QRect(1030, 160, 121, 31))
+        self.btn_next.setObjectName("btn_next")
+        self.widget_container_synthesis = QtWidgets.QWidget(self.widget_7)
+        self.widget_container_synthesis.setGeometry(QtCore.QRect(30, 10, 510, 382))
+        self.widget_container_synthesis.setObjectName("widget_container_synthesis")
+        self.widget_synthesis = QtWidgets.QWidget(self.widget_container_synthesis)
+        self.widget_synthesis.setGeometry(QtCore.QRect(190, 20, 300, 300))
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.widget_synthesis.sizePolicy().hasHeightForWidth())
+        self.widget_synthesis.setSizePolicy(sizePolicy)
+        self.widget_synthesis.setMinimumSize(QtCore.QSize(300, 300))
+        self.widget_synthesis.setStyleSheet("")
+        self.widget_synthesis.setObjectName("widget_synthesis")
+        self.label_12 = QtWidgets.QLabel(self.widget_container_synthesis)
+        self.label_12.setGeometry(QtCore.QRect(110, 20, 59, 16))
+        self.label_12.setObjectName("label_12")
+        self.layoutWidget = QtWidgets.QWidget(self.widget_container_synthesis)
+        self.layoutWidget.setGeometry(QtCore.QRect(10, 150, 176, 22))
+        self.layoutWidget.setObjectName("layoutWidget")
+        self.horizontalLayout_11 = QtWidgets.QHBoxLayout(self.layoutWidget)
+        self.horizontalLayout_11.setContentsMargins(0, 0, 0, 0)
+        self.horizontalLayout_11.setObjectName("horizontalLayout_11")
+        self.label_10 = QtWidgets.QLabel(self.layoutWidget)
+        self.label_10.setObjectName("label_10")
+        self.horizontalLayout_11.addWidget(self.label_10)
+        self.rb_synthesis_signal_1 = QtWidgets.QRadioButton(self.layoutWidget)
+        self.rb_synthesis_signal_1.setObjectName("rb_synthesis_signal_1")
+        self.horizontalLayout_11.addWidget(self.rb_synthesis_signal_1)
+        self.rb_synthesis_signal_2 = QtWidgets.QRadioButton(self.layoutWidget)
+        self.rb_synthesis_signal_2.setObjectName("rb_synthesis_signal_2")
+        self.horizontalLayout_11.addWidget(self.rb_synthesis_signal_2)
+        self.rb_synthesis_signal_3 = QtWidgets.QRadioButton(self.layoutWidget)
+        self.rb_synthesis_signal_3.setObjectName("rb_synthesis_signal_3")
+        self.horizontalLayout_11.addWidget(self.rb_synthesis_signal_3)
+        self.layoutWidget1 = QtWidgets.QWidget(self.widget_container_synthesis)
+        self.layoutWidget1.setGeometry(QtCore.QRect(10, 200, 174, 22))
+        self.layoutWidget1.setObjectName("layoutWidget1")
+        self.horizontalLayout_10 = QtWidgets.QHBoxLayout(self.layoutWidget1)
+        self.horizontalLayout_10.setContentsMargins(0, 0, 0, 0)
+        self.horizontalLayout_10.setObjectName("horizontalLayout_10")
+        self.label_9 = QtWidgets.QLabel(self.layoutWidget1)
+        self.label_9.setObjectName("label_9")
+        self.horizontalLayout_10.addWidget(self.label_9)
+        self.rb_synthesis_baseline_1 = QtWidgets.QRadioButton(self.layoutWidget1)
+        self.rb_synthesis_baseline_1.setObjectName("rb_synthesis_baseline_1")
+        self.horizontalLayout_10.addWidget(self.rb_synthesis_baseline_1)
+        self.rb_synthesis_baseline_2 = QtWidgets.QRadioButton(self.layoutWidget1)
+        self.rb_synthesis_baseline_2.setObjectName("rb_synthesis_baseline_2")
+        self.horizontalLayout_10.addWidget(self.rb_synthesis_baseline_2)
+        self.verticalLayout_6.addWidget(self.widget_7)
+        MainWindow.setCentralWidget(self.centralwidget)
+        self.menubar = QtWidgets.QMenuBar(MainWindow)
+        self.menubar.setGeometry(QtCore.QRect(0, 0, 1250, 24))
+        self.menubar.setObjectName("menubar")
+        MainWindow.setMenuBar(self.menubar)
+        self.statusbar = QtWidgets.QStatusBar(MainWindow)
+        self.statusbar.setObjectName("statusbar")
+        MainWindow.setStatusBar(self.statusbar)
+
+        self.retranslateUi(MainWindow)
+        QtCore.QMetaObject.connectSlotsByName(MainWindow)
+
+    def retranslateUi(self, MainWindow):
+        _translate = QtCore.QCoreApplication.translate
+        MainWindow.setWindowTitle(_translate("MainWindow", "MainWindow"))
+        self.label_galaxy_name.setText(_translate("MainWindow", "Current Galaxy:"))
+        self.gb_beam1.setTitle(_translate("MainWindow", "Beam1"))
+        self.label.setText(_translate("MainWindow", "RFI flag:"))
+        self.rb_beam1_rfi_1.setText(_translate("MainWindow", "0"))
+        self.rb_beam1_rfi_2.setText(_translate("MainWindow", "1"))
+        self.rb_beam1_rfi_3.setText(_translate("MainWindow", "2"))
+        self.label_2.setText(_translate("MainWindow", "Ripple flag"))
+        self.rb_beam1_ripple_1.setText(_translate("MainWindow", "0"))
+        self.rb_beam1_ripple_2.setText(_translate("MainWindow", "1"))
+        self.gb_beam2.setTitle(_translate("MainWindow", "Beam2"))
+        self.label_3.setText(_translate("MainWindow", "RFI flag:"))
+        self.rb_beam2_rfi_1.setText(_translate("MainWindow", "0"))
+        self.rb_beam2_rfi_2.setText(_translate("MainWindow", "1"))
+        self.rb_beam2_rfi_3.setText(_translate("MainWindow", "2"))
+        self.label_4.setText(_translate("MainWindow", "Ripple flag"))
+        self.rb_beam2_ripple_1.setText(_translate("MainWindow", "0"))
+        self.rb_beam2_ripple_2.setText(_translate("MainWindow", "1"))
+        self.gb_beam3.setTitle(_translate("MainWindow", "Beam3"))
+        self.label_5.setText(_translate("MainWindow", "RFI flag:"))
+        self.rb_beam3_rfi_1.setText(_translate("MainWindow", "0"))
+        self.rb_beam3_rfi_2.setText(_translate("MainWindow", "1"))
+        self.rb_beam3_rfi_3.setText(_translate("MainWindow", "2"))
+        self.label_6.setText(_translate("MainWindow", "Ripple flag"))
+        self.rb_beam3_ripple_1.setText(_translate("MainWindow", "0"))
+        self.rb_beam3_ripple_2.setText(_translate("MainWindow", "1"))
+        self.gb_beam4.setTitle(_translate("MainWindow", "Beam4"))
+        self.label_7.setText(_translate("MainWindow", "RFI flag:"))
+        self.rb_beam4_rfi_1.setText(_translate("MainWindow", "0"))
+        self.rb_beam4_rfi_2.setText(_translate("MainWindow", "1"))
+        self.rb_beam4_rfi_3.setText(_translate("MainWindow", "2"))
+        self.label_8.setText(_translate("MainWindow", "Ripple flag"))
+        self.rb_beam4_ripple_1.setText(_translate("MainWindow", "0"))
+        self.rb_beam4_ripple_2.setText(_translate("MainWindow", "1"))
+        self.label_11.setText(_translate("MainWindow", "SDSS"))
+        self.btn_next.setText(_translate("MainWindow", "Go to Next"))
+        self.label_12.setText(_translate("MainWindow", "Synthesis"))
+        self.label_10.setText(_translate("MainWindow", "Signal："))
+        self.rb_synthesis_signal_1.setText(_translate("MainWindow", "0"))
+        self.rb_synthesis_signal_2.setText(_translate("MainWindow", "1"))
+        self.rb_synthesis_signal_3.setText(_translate("MainWindow", "2"))
+        self.label_9.setText(_translate("MainWindow", "Baseline flag："))
+        self.rb_synthesis_baseline_1.setText(_translate("MainWindow", "0"))
+        self.rb_synthesis_baseline_2.setText(_translate("MainWindow", "1"))
+
+
+UI_SOURCE_HASH = "095c52212570f543858c122d9f698abdddf97bdf"